@@ -1,184 +1,344 @@
 from pathlib import Path
-import pickle
 import logging
-from typing import List
+import time
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, List, Sequence
 
 log = logging.getLogger("ai-summary.agent")
 
-try:
-    import faiss  # type: ignore
-    import numpy as np
-    from sentence_transformers import SentenceTransformer
-except Exception as e:  # pragma: no cover - optional deps
-    faiss = None  # type: ignore
-    np = None  # type: ignore
-    SentenceTransformer = None  # type: ignore
-    log.warning("Optional retrieval dependencies not available: %s", e)
+from core.lazy import lazy_import
+
+# Imported on first use: both are slow to import and not needed to start serving
+faiss = lazy_import("faiss")
+np = lazy_import("numpy")
+if faiss is None or np is None:  # pragma: no cover - optional deps
+    log.warning("Optional retrieval dependencies not available (faiss, numpy)")
 
 from uploads.config import DEFAULT_MODEL
 from core.infra import get_genai_client, get_embedding_model
+from core.streaming import stream_generate_text
+from core.config import QUERY_EMBED_CACHE_SIZE, PROGRESSIVE_PERSIST_INTERVAL
+from ai.embedders import Embedder, get_embedder
+from ai.index_registry import get_index_registry
+from ai.chunking import CHUNKER_VERSION, chunk_document
+from ai.keyword_index import KEYWORDS_FILE, KeywordIndex, reciprocal_rank_fusion
+from ai.chunk_store import CHUNKS_BLOB, CHUNKS_OFFSETS, CHUNKS_POSITIONS, ChunkStore, write_chunks, has_chunks
+from ai.faiss_index import LEGACY_INDEX_SPEC, choose_index_spec, prepare_vectors, build_index, apply_search_params
 
 import os
-from pathlib import Path
-import pickle
+import json
+
+# Indexes built before the embedder was recorded always used cloud embeddings
+LEGACY_EMBEDDER = "cloud:"
+# Vectors of an index still being built progressively
+PARTIAL_INDEX_FILE = "partial.faiss"
+# Chunks embedded per step when a build reports progress
+PROGRESS_EMBED_SLICE = 256
 
 # Do not fix the embedding model at import time; resolve at call time using infra
 EMBEDDING_MODEL = None
 
 
+def _normalize_query(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+class QueryEmbeddingCache:
+    """Thread-safe LRU of query embeddings keyed by (embedder name, normalized query)"""
+
+    def __init__(self, maxsize: int = 2048):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get_or_embed(self, embedder: Embedder, query: str):
+        key = (embedder.name, _normalize_query(query))
+        with self._lock:
+            emb = self._entries.get(key)
+            if emb is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return emb
+            self._misses += 1
+        emb = embedder.embed_query(query)
+        with self._lock:
+            self._entries[key] = emb
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return emb
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Shared by every VectorStoreManager (and so every adapter) in the process
+query_embedding_cache = QueryEmbeddingCache(maxsize=QUERY_EMBED_CACHE_SIZE)
+
+
 class VectorStoreManager:
     """Load FAISS indexes stored under a root `indexes/` directory.
 
-    Each index folder is expected to contain `index.faiss` and `index.pkl`.
-    The pickle file should contain a list of document texts or a dict with key 'texts'.
+    Each index folder is expected to contain `index.faiss` and the chunk texts
+    (`chunks.bin` + `chunks.idx`, see `ai.chunk_store`); both are memory-mapped.
+    `meta.json` records the embedder the index was built with; queries are
+    embedded with that same embedder. Legacy folders holding a pickled
+    `index.pkl` are treated as missing and get rebuilt.
+
+    A BM25 keyword index (`keywords.json`, see `ai.keyword_index`) over the
+    same chunks is written at extraction time; queries fuse keyword and vector
+    rankings, or use keywords alone until the vector index is ready.
+
+    While a document is indexed progressively, the vectors built so far are
+    in `partial.faiss` (see `IncrementalIndexBuilder`); queries use it until
+    the final `index.faiss` replaces it.
+
+    Loaded indexes live in the process-wide registry (`ai.index_registry`),
+    shared by every manager, and are reloaded when their files change on disk.
     """
 
     def __init__(self, index_root: Path):
         self.index_root = Path(index_root)
-        self._model = None
-        self._cache = {}
-
-    def _ensure_embedder(self):
-        if SentenceTransformer is None:
-            # local embedder not available; fall back to cloud embeddings
-            return
-        if self._model is None:
-            self._model = SentenceTransformer("all-MiniLM-L6-v2")
+        self._registry = get_index_registry()
 
     def has_index(self, key: str) -> bool:
+        """True once the complete vector index is on disk"""
+        folder = self.index_root / key
+        return (folder / "index.faiss").exists() and has_chunks(folder)
+
+    def has_partial_index(self, key: str) -> bool:
+        """True while a progressive build has persisted some vectors"""
         folder = self.index_root / key
-        return folder.is_dir()
+        return (folder / PARTIAL_INDEX_FILE).exists() and has_chunks(folder)
+
+    def has_keyword_index(self, key: str) -> bool:
+        folder = self.index_root / key
+        return (folder / KEYWORDS_FILE).exists() and has_chunks(folder)
+
+    def prefetch(self, key: str) -> None:
+        """Load (or reload, after a rebuild) the vector and keyword indexes into the registry"""
+        folder = self.index_root / key
+        if self.has_index(key) or self.has_partial_index(key):
+            self._registry.prefetch(
+                str(folder.resolve()), lambda: self._read_index(folder), _file_version(folder / "meta.json")
+            )
+        if self.has_keyword_index(key):
+            self._registry.prefetch(
+                f"{folder.resolve()}#keywords", lambda: self._read_keywords(folder), _keywords_version(folder)
+            )
 
     def _load_index(self, key: str):
-        if key in self._cache:
-            return self._cache[key]
         folder = self.index_root / key
+        return self._registry.get(
+            str(folder.resolve()), lambda: self._read_index(folder), _file_version(folder / "meta.json")
+        )
+
+    def _load_keywords(self, key: str):
+        folder = self.index_root / key
+        return self._registry.get(
+            f"{folder.resolve()}#keywords", lambda: self._read_keywords(folder), _keywords_version(folder)
+        )
+
+    @staticmethod
+    def _read_keywords(folder: Path):
+        """Open a keyword index; returns ((keyword index or None, texts), approximate bytes).
+
+        The keyword index is None when it was built over other chunks than the
+        chunk store next to it (e.g. left behind by an earlier, differently
+        chunked build): its ids would point at the wrong texts.
+        """
+        keywords = KeywordIndex.load(folder)
+        texts = ChunkStore(folder)
+        if not keywords.matches(len(texts), texts.boundaries_digest()):
+            log.warning("keyword index in %s does not match its chunk store; ignoring it", folder)
+            return (None, texts), texts.nbytes
+        return (keywords, texts), keywords.nbytes + texts.nbytes
+
+    def recent_keys(self, limit: int) -> List[str]:
+        """Keys of the most recently loaded or built indexes (by folder mtime)"""
+        folders = []
+        try:
+            for folder in self.index_root.iterdir():
+                if folder.is_dir() and (self.has_index(folder.name) or self.has_keyword_index(folder.name)):
+                    folders.append((folder.stat().st_mtime, folder.name))
+        except FileNotFoundError:
+            return []
+        return [key for _, key in sorted(folders, reverse=True)[:limit]]
+
+    def _read_index(self, folder: Path):
+        """Open an index folder; returns ((index, texts, embedder, spec), approximate bytes)"""
         if not folder.exists():
             raise FileNotFoundError("index not found")
+        try:
+            # the folder mtime records the last load, for `recent_keys` (warm-up prefetch)
+            os.utime(folder)
+        except OSError:
+            pass
         idx_path = folder / "index.faiss"
-        meta_path = folder / "index.pkl"
-        if not idx_path.exists() or not meta_path.exists():
+        if not idx_path.exists():
+            idx_path = folder / PARTIAL_INDEX_FILE
+        if not idx_path.exists() or not has_chunks(folder):
             raise FileNotFoundError("index files missing")
 
         if faiss is None:
             raise RuntimeError("faiss is not installed")
 
-        index = faiss.read_index(str(idx_path))
-        with open(meta_path, "rb") as f:
-            meta = pickle.load(f)
+        try:
+            index = faiss.read_index(str(idx_path), faiss.IO_FLAG_MMAP)
+        except RuntimeError:
+            # index types without mmap support are read into memory
+            index = faiss.read_index(str(idx_path))
+        texts = ChunkStore(folder)
 
-        # meta may be dict or list
-        if isinstance(meta, dict) and "texts" in meta:
-            texts = meta["texts"]
-        elif isinstance(meta, list):
-            texts = meta
-        else:
-            # try to find a reasonable attribute
-            texts = getattr(meta, "texts", None) or getattr(meta, "docs", None) or []
+        info = read_index_info(folder)
+        embedder_name = info.get("embedder") or LEGACY_EMBEDDER
+        spec = info.get("index") or LEGACY_INDEX_SPEC
+        apply_search_params(index, spec)
 
-        self._cache[key] = (index, texts)
-        return index, texts
+        return (index, texts, embedder_name, spec), _index_bytes(index) + texts.nbytes
 
     def query(self, key: str, query: str, k: int = 4) -> List[str]:
-        index, texts = self._load_index(key)
-        # compute embedding either locally or via cloud
-        if SentenceTransformer is not None and self._model is not None:
-            emb = self._model.encode([query], convert_to_numpy=True)
-            if emb.dtype != np.float32:
-                emb = emb.astype(np.float32)
-        else:
-            # use cloud embeddings
-            emb_vecs = _cloud_embeddings([query])
-            emb = np.array(emb_vecs, dtype=np.float32)
-        distances, idxs = index.search(emb, k)
-        results: List[str] = []
-        for idx in idxs[0]:
-            if idx < 0 or idx >= len(texts):
-                continue
-            results.append(texts[idx])
-        return results
-
-
-def _cloud_embeddings(texts: List[str]) -> List[List[float]]:
+        """Top `k` chunks: vector and BM25 rankings fused by reciprocal rank fusion"""
+        depth = max(k * 4, 20)
+        rankings: List[List[int]] = []
+        texts = None
+        if self.has_index(key) or self.has_partial_index(key):
+            vector_ids, texts = self._vector_search(key, query, depth)
+            rankings.append(vector_ids)
+        if self.has_keyword_index(key):
+            keywords, keyword_texts = self._load_keywords(key)
+            # None when built over other chunks (logged when loaded); a progressive
+            # build may have persisted keywords for more chunks than vectors
+            if keywords is None:
+                pass
+            elif texts is None or len(keyword_texts) >= len(texts):
+                # chunks are append-only while building: the longer store covers both rankings
+                if texts is None or len(keyword_texts) > len(texts):
+                    texts = keyword_texts
+                rankings.append([doc_id for doc_id, _ in keywords.search(query, depth)])
+            else:
+                log.warning("keyword index for %s does not match its vector index; using vectors only", key)
+        if texts is None:
+            raise FileNotFoundError("index not found")
+        fused = [i for i in reciprocal_rank_fusion(rankings) if i < len(texts)]
+        return [texts[i] for i in fused[:k]]
+
+    def _vector_search(self, key: str, query: str, n: int):
+        index, texts, embedder_name, spec = self._load_index(key)
+        # embed the query in the vector space the index was built in
+        emb = query_embedding_cache.get_or_embed(get_embedder(embedder_name), query)
+        emb = prepare_vectors(emb, spec)
+        if emb.shape[1] != index.d:
+            raise RuntimeError(
+                f"query embedding dim {emb.shape[1]} does not match index {key} (dim {index.d}, {embedder_name})"
+            )
+        distances, idxs = index.search(emb, n)
+        return [int(idx) for idx in idxs[0] if 0 <= idx < len(texts)], texts
+
+
+def _file_version(path: Path):
+    """Modification time of `path` (None if missing): registry entries reload when it changes"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _keywords_version(folder: Path):
+    """Registry version of a keyword index: it is validated against the chunk store, so both count"""
+    return _file_version(folder / KEYWORDS_FILE), _file_version(folder / CHUNKS_OFFSETS)
+
+
+def _index_bytes(index) -> int:
+    """Approximate resident size of a FAISS index"""
+    if hasattr(index, "code_size"):
+        # Flat / IVF-PQ: stored codes per vector (+ coarse centroids for IVF)
+        nlist = getattr(index, "nlist", 0)
+        return index.ntotal * index.code_size + nlist * index.d * 4
+    if hasattr(index, "hnsw"):
+        # HNSW: flat storage plus ~2*M neighbour ids per vector
+        return index.ntotal * (index.d * 4 + index.hnsw.nb_neighbors(0) * 4)
+    return index.ntotal * index.d * 4
+
+
+def read_index_info(folder: Path) -> dict:
+    """Return the build metadata recorded in an index folder (empty for legacy indexes)"""
+    try:
+        return json.loads((Path(folder) / "meta.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _cloud_embeddings(texts: List[str]) -> List[Sequence[float]]:
     """Request embeddings from configured cloud client (Google GenAI).
 
-    Returns a list of float vectors.
+    Returns a list of float vectors, in input order. Vectors already in the
+    persistent embedding cache are reused; only the remaining texts are sent, in
+    provider-sized batches (see `ai.embeddings`).
     """
-    client = get_genai_client()
-    if client is None:
-        raise RuntimeError("No cloud client configured for embeddings")
-    # resolve embedding model dynamically (tries env, cached, and fallback candidates)
-    model_name = get_embedding_model(preferred=os.getenv("EMBEDDING_MODEL"))
-    if not model_name:
-        raise RuntimeError("No embedding model available")
-    vecs: List[List[float]] = []
-    # Try primary GenAI call shape(s)
-    resp = None
-    try:
-        try:
-            resp = client.models.embed_content(model=model_name, contents=texts)
-        except TypeError:
-            # some client versions use 'input' instead of 'contents'
-            resp = client.models.embed_content(model=model_name, input=texts)
-    except Exception as e:
-        # If embed_content fails, try the older embeddings.create surface if present
-        if hasattr(client, 'embeddings') and hasattr(client.embeddings, 'create'):
-            try:
-                resp = client.embeddings.create(model=EMBEDDING_MODEL, input=texts)
-            except Exception as e2:
-                log.exception("embed_content and embeddings.create both failed: %s / %s", e, e2)
-                raise RuntimeError("Cloud embeddings call failed: %s" % e)
-        else:
-            log.exception("embed_content failed and no fallback available: %s", e)
-            raise RuntimeError("Cloud embeddings call failed: %s" % e)
-
-    # Normalize known response shapes to a list of float lists
-    try:
-        # Preferred: resp.embeddings (google.genai EmbedContentResponse)
-        if hasattr(resp, 'embeddings') and resp.embeddings:
-            for item in resp.embeddings:
-                vals = getattr(item, 'values', None) or getattr(item, 'embedding', None)
-                if vals is None and hasattr(item, '__dict__'):
-                    vals = item.__dict__.get('values') or item.__dict__.get('embedding')
-                if vals is None:
-                    continue
-                vecs.append(list(vals))
-
-        # Older shape: resp.data -> list of items with .embedding or ['embedding']
-        elif hasattr(resp, 'data') and resp.data:
-            for item in resp.data:
-                emb = getattr(item, 'embedding', None) or (item.get('embedding') if isinstance(item, dict) else None)
-                if emb is None:
-                    emb = getattr(item, 'value', None) or (item.get('value') if isinstance(item, dict) else None)
-                if emb is None:
-                    continue
-                vecs.append(list(emb))
-
-        # Dict-like: {'embeddings': [{'embedding': [...]}, ...]}
-        elif isinstance(resp, dict) and 'embeddings' in resp:
-            for item in resp['embeddings']:
-                if isinstance(item, dict) and 'embedding' in item:
-                    vecs.append(list(item['embedding']))
-
-        else:
-            # Last resort: try to introspect common attributes
-            embeddings = getattr(resp, 'embeddings', None) or getattr(resp, 'embedding', None) or getattr(resp, 'data', None)
-            if embeddings:
-                for item in embeddings:
-                    vals = getattr(item, 'values', None) or getattr(item, 'embedding', None) or (item.get('embedding') if isinstance(item, dict) else None)
-                    if vals:
-                        vecs.append(list(vals))
-
-        return vecs
-    except Exception as e:  # pragma: no cover - network/parsing
-        log.exception("failed to parse cloud embeddings response: %s", e)
-        raise
-
-
-def build_and_persist_faiss(session_id: str, text: str, index_root: Path, chunk_size: int = 1000, chunk_overlap: int = 200):
-    """Split text into chunks, compute cloud embeddings, build FAISS index and save it under index_root/session_id.
-
-    Saves `index.faiss` and `index.pkl` (pickle of texts list).
+    return list(get_embedder(LEGACY_EMBEDDER).embed_documents(texts))
+
+
+def _position(chunk) -> tuple:
+    return (chunk.start, chunk.end, chunk.page_start, chunk.page_end)
+
+
+def _persist_index(dest: Path, index, spec: dict, chunks: List[str], positions, embedder_name: str, partial: bool = False):
+    """Write an index folder: vectors, chunk texts/positions, then `meta.json` (the version stamp)"""
+    target = dest / (PARTIAL_INDEX_FILE if partial else "index.faiss")
+    # write then rename: other workers may have the previous file memory-mapped;
+    # temp names are per process since workers may build the same folder
+    tmp_path = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    faiss.write_index(index, str(tmp_path))
+    os.replace(tmp_path, target)
+    write_chunks(dest, chunks, positions)
+    if not partial:
+        (dest / PARTIAL_INDEX_FILE).unlink(missing_ok=True)
+        # drop the pickled texts of a legacy index rebuilt in place
+        (dest / "index.pkl").unlink(missing_ok=True)
+    meta_tmp = dest / f"meta.json.{os.getpid()}.tmp"
+    meta_tmp.write_text(
+        json.dumps({
+            "embedder": embedder_name,
+            "dim": index.d,
+            "chunks": len(chunks),
+            "chunker": CHUNKER_VERSION,
+            "index": spec,
+            "partial": partial,
+        }), encoding="utf-8"
+    )
+    os.replace(meta_tmp, dest / "meta.json")
+
+
+def build_and_persist_faiss(
+    session_id: str,
+    text: str,
+    index_root: Path,
+    embedder: Embedder | None = None,
+    pages: Sequence[str] | None = None,
+    max_tokens: int | None = None,
+    overlap_tokens: int | None = None,
+    progress: Callable[[int, int], None] | None = None,
+):
+    """Split text into chunks, compute embeddings, build FAISS index and save it under index_root/session_id.
+
+    Text is split by the structure-aware chunker (`ai.chunking`); when the
+    extracted `pages` are given, each chunk also records the pages it spans.
+    Saves `index.faiss`, the chunk texts and positions (`chunks.*`), `meta.json`
+    (embedder name, dimension and index configuration) and the BM25 keywords. The index type is
+    chosen from the chunk count (see `ai.faiss_index`). Uses the configured
+    default embedder unless one is given. `progress(done, total)` is called as
+    chunks are embedded; an exception raised by it aborts the build.
     """
     if faiss is None or np is None:
         log.warning("faiss or numpy not available; skipping index build")
@@ -187,30 +347,214 @@ def build_and_persist_faiss(session_id: str, text: str, index_root: Path, chunk_
     dest = index_root / session_id
     dest.mkdir(parents=True, exist_ok=True)
 
-    # naive chunking by characters
-    chunks = []
-    i = 0
-    L = len(text)
-    while i < L:
-        chunk = text[i : i + chunk_size]
-        chunks.append(chunk)
-        i += chunk_size - chunk_overlap
-
-    # compute embeddings via cloud
-    vecs = _cloud_embeddings(chunks)
-    if not vecs:
+    pieces = chunk_document(text=text, pages=pages, max_tokens=max_tokens, overlap_tokens=overlap_tokens)
+    chunks = [c.text for c in pieces]
+
+    # compute embeddings (cloud or local, per configuration)
+    embedder = embedder or get_embedder()
+    if progress is None:
+        arr = embedder.embed_documents(chunks)
+    else:
+        progress(0, len(chunks))
+        parts = []
+        for i in range(0, len(chunks), PROGRESS_EMBED_SLICE):
+            parts.append(embedder.embed_documents(chunks[i:i + PROGRESS_EMBED_SLICE]))
+            progress(i + len(parts[-1]), len(chunks))
+        arr = np.vstack(parts) if parts else np.zeros((0, 0), dtype="float32")
+    if arr.size == 0:
         log.warning("no embeddings produced; skipping index persist")
         return
 
-    arr = np.array(vecs, dtype=np.float32)
     dim = arr.shape[1]
-    index = faiss.IndexFlatL2(dim)
-    index.add(arr)
+    spec = choose_index_spec(len(chunks), dim)
+    index = build_index(prepare_vectors(arr, spec), spec)
+
+    _persist_index(dest, index, spec, chunks, [_position(c) for c in pieces], embedder.name)
+    # keywords over the same pieces: a keyword index from an earlier build may use other chunk ids
+    KeywordIndex.build(chunks).save(dest)
+    log.info(
+        "built faiss index for session %s (chunks=%d dim=%d embedder=%s index=%s/%s)",
+        session_id, len(chunks), dim, embedder.name, spec["factory"], spec["metric"],
+    )
+
+
+def build_keyword_index(
+    session_id: str,
+    text: str,
+    index_root: Path,
+    pages: Sequence[str] | None = None,
+):
+    """Chunk text and persist its chunks and BM25 keyword index under index_root/session_id.
+
+    Uses the same chunker settings as `build_and_persist_faiss`, so the vector
+    index built later over the same text has the same chunk ids.
+    """
+    dest = Path(index_root) / session_id
+    dest.mkdir(parents=True, exist_ok=True)
+    if (dest / "index.faiss").exists() and has_chunks(dest):
+        # keep chunk ids aligned with the existing vector index
+        chunks = list(ChunkStore(dest))
+    else:
+        pieces = chunk_document(text=text, pages=pages)
+        chunks = [c.text for c in pieces]
+        write_chunks(dest, chunks, [_position(c) for c in pieces])
+    keywords = KeywordIndex.build(chunks)
+    keywords.save(dest)
+    log.info("built keyword index for session %s (chunks=%d terms=%d)", session_id, len(chunks), len(keywords.postings))
+
+
+class IncrementalIndexBuilder:
+    """Builds an index folder batch by batch while a document is still being extracted.
+
+    Each `add_pages` call chunks the new pages (chunks never span two batches),
+    embeds them and appends them to an exact Flat index. The vectors, chunks and
+    BM25 keywords built so far are persisted as a partial index (`partial.faiss`)
+    at most every `persist_interval` seconds, so retrieval can use them right
+    away. `finish` writes the final `index.faiss`, rebuilt with the index type
+    chosen for the final chunk count (see `ai.faiss_index`).
+
+    `write_keywords` is called with all page batches once extraction finishes:
+    it chunks the batches not embedded yet the same way and writes the chunk
+    texts and BM25 keywords for the whole document, so keyword search does not
+    wait for (or depend on) the embeddings. `discard` removes the files of a
+    cancelled build; `abandon` only the partial vectors of a failed one.
+    """
 
-    faiss.write_index(index, str(dest / "index.faiss"))
-    with open(dest / "index.pkl", "wb") as f:
-        pickle.dump(chunks, f)
-    log.info("built faiss index for session %s (chunks=%d dim=%d)", session_id, len(chunks), dim)
+    def __init__(self, session_id: str, index_root: Path, embedder: Embedder | None = None,
+                 persist_interval: float | None = None):
+        if faiss is None or np is None:
+            raise RuntimeError("faiss or numpy not available")
+        self.session_id = session_id
+        self.dest = Path(index_root) / session_id
+        self.dest.mkdir(parents=True, exist_ok=True)
+        self.embedder = embedder or get_embedder()
+        self.persist_interval = PROGRESSIVE_PERSIST_INTERVAL if persist_interval is None else persist_interval
+        # chunks of every batch seen so far; `_batch_ends[i]` is the end of batch i
+        self._chunks: List[str] = []
+        self._positions: List[tuple] = []
+        self._batch_ends: List[int] = []
+        self._embedded_batches = 0
+        self._vectors: List["np.ndarray"] = []
+        self._index = None
+        self._spec = None
+        self._pages = 0
+        self._offset = 0
+        self._last_persist = time.monotonic()
+        self._keywords_complete = False
+        # a cancelled job can leave add_pages running on its thread; once
+        # discarded (or abandoned), no vectors are persisted any more
+        self._lock = threading.Lock()
+        self._discarded = False
+        self._abandoned = False
+
+    @property
+    def chunks(self) -> int:
+        """Number of embedded chunks"""
+        return self._batch_ends[self._embedded_batches - 1] if self._embedded_batches else 0
+
+    def _chunk_batch(self, pages: Sequence[str]) -> None:
+        """Chunk the next batch in document coordinates (caller holds `_lock`)"""
+        pieces = chunk_document(pages=pages)
+        # shift batch-local offsets and page numbers to document coordinates
+        base_page = self._pages
+        self._chunks.extend(c.text for c in pieces)
+        self._positions.extend(
+            (c.start + self._offset, c.end + self._offset, c.page_start + base_page, c.page_end + base_page)
+            for c in pieces
+        )
+        self._pages += len(pages)
+        self._offset += len("\n".join(pages)) + 1
+        self._batch_ends.append(len(self._chunks))
+
+    def add_pages(self, pages: Sequence[str]) -> int:
+        """Index the next pages of the document; returns the number of chunks so far"""
+        if not pages:
+            return self.chunks
+        with self._lock:
+            batch = self._embedded_batches
+            if batch == len(self._batch_ends):
+                self._chunk_batch(pages)
+            texts = self._chunks[self._batch_ends[batch - 1] if batch else 0:self._batch_ends[batch]]
+
+        if texts:
+            arr = self.embedder.embed_documents(texts)
+            if self._index is None:
+                # exact search while building; the final type is chosen in finish()
+                self._spec = choose_index_spec(0, arr.shape[1])
+                self._index = build_index(prepare_vectors(arr[:0], self._spec), self._spec)
+            self._index.add(prepare_vectors(arr, self._spec))
+            self._vectors.append(arr)
+        self._embedded_batches += 1
+
+        if self._index is not None and time.monotonic() - self._last_persist >= self.persist_interval:
+            self._persist(partial=True)
+        return self.chunks
+
+    def write_keywords(self, batches: Sequence[Sequence[str]]) -> int:
+        """Chunk the remaining `batches` and write chunk texts and keywords for all of them.
+
+        `batches` are all page batches of the document, in the order they are
+        (or would have been) passed to `add_pages`. Returns the number of chunks.
+        """
+        with self._lock:
+            if self._discarded:
+                return 0
+            for pages in batches[len(self._batch_ends):]:
+                if pages:
+                    self._chunk_batch(pages)
+            # the store now runs ahead of the vectors; ids beyond them are keyword-only
+            write_chunks(self.dest, self._chunks, self._positions)
+            KeywordIndex.build(self._chunks).save(self.dest)
+            self._keywords_complete = True
+            return len(self._chunks)
+
+    def finish(self) -> int:
+        """Write the final index; returns the number of chunks"""
+        if self._index is None:
+            log.warning("no chunks for session %s; skipping index persist", self.session_id)
+            return 0
+        vectors = np.vstack(self._vectors)
+        spec = choose_index_spec(len(vectors), vectors.shape[1])
+        if spec != self._spec:
+            self._index = build_index(prepare_vectors(vectors, spec), spec)
+            self._spec = spec
+        self._persist(partial=False)
+        log.info(
+            "built progressive faiss index for session %s (pages=%d chunks=%d index=%s/%s)",
+            self.session_id, self._pages, self.chunks, spec["factory"], spec["metric"],
+        )
+        return self.chunks
+
+    def discard(self) -> None:
+        """Remove the partial index of an abandoned build (keeps a finished `index.faiss`)"""
+        with self._lock:
+            self._discarded = True
+            if (self.dest / "index.faiss").exists():
+                return
+            for name in (PARTIAL_INDEX_FILE, KEYWORDS_FILE, CHUNKS_OFFSETS, CHUNKS_BLOB, CHUNKS_POSITIONS, "meta.json"):
+                (self.dest / name).unlink(missing_ok=True)
+            try:
+                self.dest.rmdir()
+            except OSError:
+                pass
+
+    def abandon(self) -> None:
+        """Remove the partial vectors of a failed build; chunk texts and keywords stay searchable"""
+        with self._lock:
+            self._abandoned = True
+            if (self.dest / "index.faiss").exists():
+                return
+            for name in (PARTIAL_INDEX_FILE, "meta.json"):
+                (self.dest / name).unlink(missing_ok=True)
+
+    def _persist(self, partial: bool) -> None:
+        with self._lock:
+            if self._discarded or self._abandoned:
+                return
+            _persist_index(self.dest, self._index, self._spec, self._chunks, self._positions, self.embedder.name, partial)
+            if not self._keywords_complete:
+                KeywordIndex.build(self._chunks).save(self.dest)
+        self._last_persist = time.monotonic()
 
 
 def build_lesson_prompt(core_text: str, retrieved_chunks: List[str] | None = None, language: str = "العربية") -> str:
@@ -247,8 +591,5 @@ async def stream_agent_response(prompt: str, model: str | None = None):
     if client is None:
         raise RuntimeError("No cloud client configured for generation")
     model_key = model or DEFAULT_MODEL
-    stream = client.models.generate_content_stream(model=model_key, contents=[prompt])
-    for chunk in stream:
-        token = getattr(chunk, "text", None)
-        if token:
-            yield token
+    async for token in stream_generate_text(client, model=model_key, contents=[prompt]):
+        yield token
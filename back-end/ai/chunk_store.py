@@ -0,0 +1,153 @@
+"""Memory-mapped chunk texts for FAISS index folders.
+
+Chunks are stored as one UTF-8 blob (``chunks.bin``) plus ``n + 1`` little-endian
+uint64 byte offsets (``chunks.idx``). Both files are opened with ``mmap``, so
+loading is O(1) and every worker process shares the same pages through the OS
+page cache; chunk ``i`` is decoded on access from ``blob[off[i]:off[i + 1]]``.
+
+An optional ``chunks.pos`` holds each chunk's position in the document: start
+and end character offsets (uint64) and first/last page (uint32, 0 if unknown).
+"""
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Iterable, Optional, Sequence, Tuple
+
+CHUNKS_BLOB = "chunks.bin"
+CHUNKS_OFFSETS = "chunks.idx"
+CHUNKS_POSITIONS = "chunks.pos"
+
+_OFFSET = struct.Struct("<Q")
+_POSITION = struct.Struct("<QQII")
+_OPEN_ATTEMPTS = 3
+_OPEN_RETRY_DELAY = 0.05
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    # per-process name: another worker may be writing the same folder
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _offsets_bytes(offsets: Sequence[int]) -> bytes:
+    return struct.pack(f"<{len(offsets)}Q", *offsets)
+
+
+def boundaries_digest(byte_lengths: Sequence[int]) -> str:
+    """Digest of the chunk boundaries `write_chunks` records for chunks of these UTF-8 lengths"""
+    offsets = [0]
+    for length in byte_lengths:
+        offsets.append(offsets[-1] + length)
+    return hashlib.sha256(_offsets_bytes(offsets)).hexdigest()
+
+
+def write_chunks(
+    folder: Path,
+    chunks: Iterable[str],
+    positions: Optional[Sequence[Tuple[int, int, int, int]]] = None,
+) -> int:
+    """Persist `chunks` (and their (start, end, page_start, page_end) positions) under `folder`.
+
+    Returns the number of chunks written.
+    """
+    folder = Path(folder)
+    blob = bytearray()
+    offsets = [0]
+    for chunk in chunks:
+        blob += chunk.encode("utf-8")
+        offsets.append(len(blob))
+    _write_atomic(folder / CHUNKS_BLOB, bytes(blob))
+    if positions is not None:
+        if len(positions) != len(offsets) - 1:
+            raise ValueError("one position per chunk expected")
+        _write_atomic(folder / CHUNKS_POSITIONS, b"".join(_POSITION.pack(*p) for p in positions))
+    else:
+        (folder / CHUNKS_POSITIONS).unlink(missing_ok=True)
+    # the offsets file goes last: its presence marks a complete chunk store
+    _write_atomic(folder / CHUNKS_OFFSETS, _offsets_bytes(offsets))
+    return len(offsets) - 1
+
+
+def has_chunks(folder: Path) -> bool:
+    folder = Path(folder)
+    return (folder / CHUNKS_BLOB).exists() and (folder / CHUNKS_OFFSETS).exists()
+
+
+def _map(path: Path):
+    """Read-only mmap of `path` (plain bytes for empty files, which cannot be mapped)"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class ChunkStore(Sequence[str]):
+    """Read-only, memory-mapped sequence of chunk texts"""
+
+    def __init__(self, folder: Path):
+        folder = Path(folder)
+        # the files are replaced one by one on a rebuild; a reader opening in
+        # between can pair a new blob with old offsets, so retry until they match
+        for _ in range(_OPEN_ATTEMPTS):
+            if self._open(folder):
+                return
+            time.sleep(_OPEN_RETRY_DELAY)
+        raise ValueError(f"chunk blob and offsets in {folder} do not match")
+
+    def _open(self, folder: Path) -> bool:
+        """Map the chunk files; False if they belong to different writes"""
+        self._blob = _map(folder / CHUNKS_BLOB)
+        self._offsets_buf = _map(folder / CHUNKS_OFFSETS)
+        count = len(self._offsets_buf) // _OFFSET.size
+        if count == 0:
+            raise ValueError(f"corrupt chunk offsets in {folder}")
+        if sys.byteorder == "little":
+            self._offsets = memoryview(self._offsets_buf).cast("Q")
+        else:  # pragma: no cover - big-endian hosts
+            self._offsets = [v for (v,) in _OFFSET.iter_unpack(self._offsets_buf)]
+        self._len = count - 1
+        positions = folder / CHUNKS_POSITIONS
+        self._positions = _map(positions) if positions.exists() else None
+        # the blob is exactly the concatenated chunks, so its length is the final offset
+        if self._offsets[-1] != len(self._blob):
+            return False
+        return self._positions is None or len(self._positions) == self._len * _POSITION.size
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._len))]
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError("chunk index out of range")
+        return self._blob[self._offsets[i]:self._offsets[i + 1]].decode("utf-8")
+
+    def position(self, i: int) -> Optional[Tuple[int, int, int, int]]:
+        """(start, end, page_start, page_end) of chunk `i`, or None if not recorded"""
+        if self._positions is None:
+            return None
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError("chunk index out of range")
+        return _POSITION.unpack_from(self._positions, i * _POSITION.size)
+
+    def boundaries_digest(self) -> str:
+        """Digest of the chunk boundaries (see `boundaries_digest`)"""
+        return hashlib.sha256(self._offsets_buf).hexdigest()
+
+    @property
+    def nbytes(self) -> int:
+        """Mapped size (blob + offsets + positions); pages are shared between processes"""
+        return len(self._blob) + len(self._offsets_buf) + len(self._positions or b"")
@@ -0,0 +1,212 @@
+"""Structure-aware chunking for index builds.
+
+Splits extracted document text into retrieval chunks along its own structure
+instead of fixed character windows:
+
+- page boundaries and blank lines delimit blocks (paragraphs);
+- short heading lines (numbered, or Arabic section words such as الفصل / المبحث)
+  always open a new chunk and stay attached to the text that follows them;
+- blocks are split into sentences on Arabic and Latin terminators (. ! ? ؟ …),
+  over-long sentences on clause separators (، ؛ , ; :) and finally on words.
+
+Sentences are packed greedily up to a token budget. Consecutive chunks overlap
+by whole trailing sentences only, up to a small token budget. Each chunk keeps
+its character offsets in the document text and the (1-based) pages it spans.
+"""
+from __future__ import annotations
+
+import bisect
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+from core.config import CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS
+
+# Words (Arabic letters with their diacritics) and individual punctuation marks
+_TOKEN_RE = re.compile(r"[\w\u064B-\u065F\u0670]+|[^\w\s]")
+_BLOCK_SEP_RE = re.compile(r"(?:\r?\n[ \t\u00a0]*){2,}")
+_LINE_RE = re.compile(r"[^\r\n]+")
+_SENTENCE_END_RE = re.compile(r"[.!?؟…۔]+[\"'»)\]]*(?=\s|$)")
+_CLAUSE_END_RE = re.compile(r"[،؛,;:]+(?=\s|$)")
+_HEADING_RE = re.compile(
+    r"^\s*(?:#{1,6}\s|\d{1,3}(?:\.\d{1,3})*[.)\-]?\s|[IVXLC]+[.)]\s|"
+    r"(?:الفصل|الباب|المبحث|المطلب|القسم|الوحدة|الدرس|الجزء|مقدمة|المقدمة|خاتمة|الخاتمة|تمهيد|"
+    r"أولا|أولاً|ثانيا|ثانياً|ثالثا|ثالثاً|رابعا|رابعاً|خامسا|خامساً|Chapter|Section|Introduction|Conclusion)\b)"
+)
+_HEADING_MAX_TOKENS = 12
+
+# Recorded in the index metadata; bump when chunk boundaries change
+CHUNKER_VERSION = "structure-v1"
+
+
+def count_tokens(text: str) -> int:
+    """Approximate token count: words plus punctuation marks"""
+    return len(_TOKEN_RE.findall(text))
+
+
+@dataclass
+class Chunk:
+    """A retrieval chunk: `text == document[start:end]`, on pages `page_start..page_end` (0 if unknown)"""
+    text: str
+    start: int
+    end: int
+    page_start: int = 0
+    page_end: int = 0
+    tokens: int = 0
+
+
+@dataclass
+class _Unit:
+    start: int
+    end: int
+    tokens: int
+    heading: bool = False
+    block_start: bool = False
+
+
+def _strip_span(text: str, start: int, end: int) -> Tuple[int, int]:
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _split_on(pattern: re.Pattern, text: str, start: int, end: int) -> List[Tuple[int, int]]:
+    """Split text[start:end] after each match of `pattern` (separators stay with the left part)"""
+    spans = []
+    pos = start
+    for m in pattern.finditer(text, start, end):
+        spans.append((pos, m.end()))
+        pos = m.end()
+    spans.append((pos, end))
+    return [s for s in (_strip_span(text, a, b) for a, b in spans) if s[0] < s[1]]
+
+
+def _split_words(text: str, start: int, end: int, max_tokens: int) -> List[Tuple[int, int]]:
+    """Split an over-long span on whitespace into pieces of at most `max_tokens`"""
+    spans = []
+    piece_start = start
+    tokens = 0
+    for m in re.finditer(r"\S+", text[start:end]):
+        word_tokens = count_tokens(m.group())
+        if tokens and tokens + word_tokens > max_tokens:
+            spans.append(_strip_span(text, piece_start, start + m.start()))
+            piece_start, tokens = start + m.start(), 0
+        tokens += word_tokens
+    spans.append(_strip_span(text, piece_start, end))
+    return [s for s in spans if s[0] < s[1]]
+
+
+def _sentences(text: str, start: int, end: int, max_tokens: int) -> List[_Unit]:
+    units = []
+    for s_start, s_end in _split_on(_SENTENCE_END_RE, text, start, end):
+        tokens = count_tokens(text[s_start:s_end])
+        if tokens <= max_tokens:
+            units.append(_Unit(s_start, s_end, tokens))
+            continue
+        for c_start, c_end in _split_on(_CLAUSE_END_RE, text, s_start, s_end):
+            for w_start, w_end in _split_words(text, c_start, c_end, max_tokens):
+                units.append(_Unit(w_start, w_end, count_tokens(text[w_start:w_end])))
+    return units
+
+
+def _is_heading(line: str) -> bool:
+    stripped = line.strip()
+    if not stripped or stripped[-1] in ".،,؛;!?؟…":
+        return False
+    return count_tokens(stripped) <= _HEADING_MAX_TOKENS and bool(_HEADING_RE.match(stripped))
+
+
+def _units(text: str, spans: Sequence[Tuple[int, int]], max_tokens: int) -> List[_Unit]:
+    """Sentence units of every block (blank-line separated, within each page span)"""
+    units: List[_Unit] = []
+    for span_start, span_end in spans:
+        block_spans = _split_on(_BLOCK_SEP_RE, text, span_start, span_end)
+        for b_start, b_end in block_spans:
+            first = True
+            body_start = b_start
+            # heading lines become their own units; the rest of the block is body text
+            for line in _LINE_RE.finditer(text, b_start, b_end):
+                if not _is_heading(line.group()):
+                    continue
+                if body_start < line.start():
+                    body = _sentences(text, body_start, line.start(), max_tokens)
+                    if body:
+                        body[0].block_start = first
+                        first = False
+                        units.extend(body)
+                h_start, h_end = _strip_span(text, line.start(), line.end())
+                units.append(_Unit(h_start, h_end, count_tokens(text[h_start:h_end]), heading=True, block_start=True))
+                first = False
+                body_start = line.end()
+            body = _sentences(text, body_start, b_end, max_tokens)
+            if body:
+                body[0].block_start = first
+                units.extend(body)
+    return units
+
+
+def chunk_document(
+    text: Optional[str] = None,
+    pages: Optional[Sequence[str]] = None,
+    max_tokens: Optional[int] = None,
+    overlap_tokens: Optional[int] = None,
+) -> List[Chunk]:
+    """Chunk a document given as `pages` (joined with "\\n", as extraction does) or plain `text`.
+
+    Page numbers are only known when `pages` is given.
+    """
+    max_tokens = max_tokens or CHUNK_MAX_TOKENS
+    overlap_tokens = CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+    if pages is not None:
+        text = "\n".join(pages)
+        page_starts, spans, pos = [], [], 0
+        for page in pages:
+            page_starts.append(pos)
+            spans.append((pos, pos + len(page)))
+            pos += len(page) + 1
+    else:
+        text = text or ""
+        page_starts, spans = [], [(0, len(text))]
+
+    def page_of(offset: int) -> int:
+        return bisect.bisect_right(page_starts, offset) if page_starts else 0
+
+    chunks: List[Chunk] = []
+    current: List[_Unit] = []
+    tokens = 0
+
+    def flush() -> None:
+        start, end = current[0].start, current[-1].end
+        chunks.append(Chunk(
+            text=text[start:end],
+            start=start,
+            end=end,
+            page_start=page_of(start),
+            page_end=page_of(end - 1),
+            tokens=tokens,
+        ))
+
+    for unit in _units(text, spans, max_tokens):
+        only_headings = all(u.heading for u in current)
+        starts_section = unit.heading and not only_headings
+        if current and (starts_section or tokens + unit.tokens > max_tokens):
+            flush()
+            carry: List[_Unit] = []
+            if not unit.heading:
+                # overlap: whole trailing sentences of the same block, within the budget
+                carried = 0
+                for prev in reversed(current):
+                    if prev.heading or carried + prev.tokens > min(overlap_tokens, max_tokens - unit.tokens):
+                        break
+                    carry.insert(0, prev)
+                    carried += prev.tokens
+                    if prev.block_start:
+                        break
+            current, tokens = carry, sum(u.tokens for u in carry)
+        current.append(unit)
+        tokens += unit.tokens
+    if current:
+        flush()
+    return chunks
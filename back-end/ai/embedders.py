@@ -0,0 +1,186 @@
+"""Pluggable embedders shared by index builds and queries.
+
+Every embedder has a stable `name` (e.g. ``cloud:models/text-embedding-004`` or
+``local:<model>``) that is recorded in each index folder, so a query is always
+embedded in the same vector space its index was built in.
+"""
+import logging
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from core.lazy import lazy_import
+from core.config import (
+    EMBEDDER_BACKEND,
+    LOCAL_EMBEDDING_MODEL,
+    LOCAL_EMBEDDING_BACKEND,
+    LOCAL_EMBEDDING_FILE,
+    LOCAL_EMBED_BATCH_SIZE,
+    LOCAL_EMBED_THREADS,
+)
+from ai.embeddings import get_embedding_client, resolve_embedding_model
+from ai.embedding_cache import get_embedding_cache
+
+log = logging.getLogger("ai-summary.embedders")
+
+# Imported on first use (see core.lazy)
+np = lazy_import("numpy")
+
+
+class Embedder(ABC):
+    """Turns texts into float32 vectors; `name` identifies the vector space"""
+
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        ...
+
+    @abstractmethod
+    def _embed_uncached(self, texts: List[str]) -> "np.ndarray":
+        """Embed texts without consulting the cache"""
+        ...
+
+    def embed_documents(self, texts: List[str]) -> "np.ndarray":
+        """Return a (len(texts), dim) float32 matrix; cached vectors are reused"""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        cache = get_embedding_cache()
+        if cache is None:
+            return self._embed_uncached(texts)
+        name = self.name
+        vecs = cache.get_many(name, texts)
+        missing = [i for i, vec in enumerate(vecs) if vec is None]
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            fresh = self._embed_uncached(missing_texts)
+            cache.put_many(name, missing_texts, fresh)
+            for i, vec in zip(missing, fresh):
+                vecs[i] = vec
+        if len(texts) > 1:
+            log.info("%s: %d cached, %d embedded", name, len(texts) - len(missing), len(missing))
+        return np.vstack(vecs).astype(np.float32, copy=False)
+
+    def embed_query(self, text: str) -> "np.ndarray":
+        """Return a (1, dim) float32 matrix for a search query.
+
+        Bypasses the persistent cache: one-off queries would only evict chunk
+        vectors there (repeated queries hit `ai.agent.query_embedding_cache`).
+        """
+        return np.asarray(self._embed_uncached([text]), dtype=np.float32)
+
+
+class CloudEmbedder(Embedder):
+    """GenAI embeddings through the batched, retried `EmbeddingClient`"""
+
+    def __init__(self, model_name: Optional[str] = None):
+        self._model_name = model_name
+
+    @property
+    def model_name(self) -> str:
+        if self._model_name is None:
+            self._model_name = resolve_embedding_model()
+        return self._model_name
+
+    @property
+    def name(self) -> str:
+        return f"cloud:{self.model_name}"
+
+    def _embed_uncached(self, texts: List[str]) -> "np.ndarray":
+        vecs = get_embedding_client().embed(texts, model_name=self.model_name)
+        return np.asarray(vecs, dtype=np.float32)
+
+
+class LocalEmbedder(Embedder):
+    """sentence-transformers on CPU, with optional ONNX/OpenVINO (e.g. quantized) inference.
+
+    Inputs are encoded in batches spread over a small thread pool; the model is
+    loaded on first use.
+    """
+
+    def __init__(
+        self,
+        model_name: str = LOCAL_EMBEDDING_MODEL,
+        backend: str = LOCAL_EMBEDDING_BACKEND,
+        file_name: str = LOCAL_EMBEDDING_FILE,
+        batch_size: int = LOCAL_EMBED_BATCH_SIZE,
+        threads: int = LOCAL_EMBED_THREADS,
+    ):
+        self.model_name = model_name
+        self.backend = backend or "torch"
+        self.file_name = file_name or ""
+        self.batch_size = max(1, batch_size)
+        self.threads = max(1, threads)
+        self._model = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        name = f"local:{self.model_name}"
+        if self.backend != "torch":
+            name += f"@{self.backend}"
+        if self.file_name:
+            name += f"#{self.file_name}"
+        return name
+
+    def _load(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    kwargs = {"device": "cpu"}
+                    if self.backend != "torch":
+                        kwargs["backend"] = self.backend
+                        if self.file_name:
+                            kwargs["model_kwargs"] = {"file_name": self.file_name}
+                    self._model = SentenceTransformer(self.model_name, **kwargs)
+                    self._pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="local-embed")
+                    log.info("loaded local embedder %s", self.name)
+        return self._model
+
+    def _encode(self, batch: List[str]) -> "np.ndarray":
+        return self._model.encode(
+            batch, batch_size=self.batch_size, convert_to_numpy=True, show_progress_bar=False
+        ).astype(np.float32, copy=False)
+
+    def _embed_uncached(self, texts: List[str]) -> "np.ndarray":
+        self._load()
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if len(batches) == 1:
+            return self._encode(batches[0])
+        return np.vstack(list(self._pool.map(self._encode, batches)))
+
+
+_embedders: Dict[str, Embedder] = {}
+_embedders_lock = threading.Lock()
+
+
+def get_embedder(name: Optional[str] = None) -> Embedder:
+    """Return the embedder for a recorded `name`, or the configured default for new builds.
+
+    Names look like ``cloud:<model>`` or ``local:<model>[@backend][#file]``.
+    """
+    key = name or f"default:{EMBEDDER_BACKEND}"
+    embedder = _embedders.get(key)
+    if embedder is not None:
+        return embedder
+    with _embedders_lock:
+        embedder = _embedders.get(key)
+        if embedder is None:
+            embedder = _create_embedder(name)
+            _embedders[key] = embedder
+    return embedder
+
+
+def _create_embedder(name: Optional[str]) -> Embedder:
+    if name is None:
+        return LocalEmbedder() if EMBEDDER_BACKEND == "local" else CloudEmbedder()
+    kind, _, spec = name.partition(":")
+    if kind == "cloud":
+        return CloudEmbedder(spec or None)
+    if kind == "local":
+        spec, _, file_name = spec.partition("#")
+        model_name, _, backend = spec.partition("@")
+        return LocalEmbedder(model_name=model_name, backend=backend or "torch", file_name=file_name)
+    raise ValueError(f"Unknown embedder: {name}")
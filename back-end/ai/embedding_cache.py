@@ -0,0 +1,144 @@
+"""Persistent embedding cache.
+
+Vectors are stored on disk as compact float32 rows keyed by (embedding model,
+SHA-256 of the chunk text), so re-indexing a revised document or a duplicate
+chunk only embeds the text that has not been seen before. Backed by SQLite in
+WAL mode, which lets every worker process read and write it concurrently.
+"""
+import hashlib
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from core.config import EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ROWS
+from core.lazy import lazy_import
+
+# Imported on first use (see core.lazy)
+np = lazy_import("numpy")
+
+log = logging.getLogger("ai-summary.embedding_cache")
+
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_CHUNK = 500
+# Trim to this share of the cap, so the next trim is many inserts away
+_TRIM_TO = 0.9
+
+
+def _text_hash(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """Disk-backed (model, text hash) -> float32 vector cache"""
+
+    def __init__(self, db_path: Path, max_rows: int = 500000):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_rows = max_rows
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._rows: Optional[int] = None  # row count estimate; other workers insert too
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " text_hash BLOB NOT NULL,"
+            " dim INTEGER NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " PRIMARY KEY (model, text_hash))"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional["np.ndarray"]]:
+        """Return the cached vector for each text, or None where it is not cached"""
+        hashes = [_text_hash(t) for t in texts]
+        found = {}
+        conn = self._conn()
+        unique = list(set(hashes))
+        for i in range(0, len(unique), _LOOKUP_CHUNK):
+            part = unique[i:i + _LOOKUP_CHUNK]
+            rows = conn.execute(
+                f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({','.join('?' * len(part))})",
+                (model, *part),
+            ).fetchall()
+            for text_hash, blob in rows:
+                found[text_hash] = np.frombuffer(blob, dtype=np.float32)
+        result = [found.get(h) for h in hashes]
+        hits = sum(1 for v in result if v is not None)
+        with self._lock:
+            self._hits += hits
+            self._misses += len(result) - hits
+        return result
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        """Store vectors (converted to float32) for the given texts"""
+        rows = []
+        for text, vec in zip(texts, vectors):
+            arr = np.asarray(vec, dtype=np.float32)
+            rows.append((model, _text_hash(text), int(arr.shape[0]), arr.tobytes()))
+        if not rows:
+            return
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, dim, vector) VALUES (?, ?, ?, ?)", rows
+            )
+            # Keep the newest rows within the cap; the trim scans the table, so
+            # only run it once the (over-)estimated row count passes the cap
+            with self._lock:
+                if self._rows is not None:
+                    self._rows += len(rows)
+                over = self._rows is None or self._rows > self.max_rows
+            if over:
+                count = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+                if count > self.max_rows:
+                    keep = int(self.max_rows * _TRIM_TO)
+                    conn.execute(
+                        "DELETE FROM embeddings WHERE rowid IN ("
+                        " SELECT rowid FROM embeddings ORDER BY rowid DESC LIMIT -1 OFFSET ?)",
+                        (keep,),
+                    )
+                    count = keep
+                with self._lock:
+                    self._rows = count
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Return the process-wide embedding cache (None when numpy is unavailable)"""
+    global _embedding_cache
+    if np is None:
+        return None
+    if _embedding_cache is None:
+        with _cache_lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache(EMBEDDING_CACHE_PATH, max_rows=EMBEDDING_CACHE_MAX_ROWS)
+    return _embedding_cache
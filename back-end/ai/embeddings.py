@@ -0,0 +1,201 @@
+"""Batched, concurrent cloud embedding client.
+
+Splits inputs into provider-sized batches, sends them concurrently on a bounded
+thread pool, retries transient failures with jittered exponential backoff and
+returns the vectors in input order.
+"""
+import os
+import random
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from core.config import EMBED_BATCH_SIZE, EMBED_CONCURRENCY, EMBED_MAX_RETRIES
+from core.infra import get_genai_client, get_embedding_model
+
+log = logging.getLogger("ai-summary.embeddings")
+
+# HTTP status codes worth retrying (rate limits, timeouts, server errors)
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+def _is_transient(exc: Exception) -> bool:
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    if isinstance(code, int):
+        return code in RETRYABLE_STATUS
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    # httpx transport errors (connect/read timeouts, resets) without importing httpx here
+    return type(exc).__module__.startswith(("httpx", "httpcore"))
+
+
+def _request_embeddings(client, model_name: str, texts: List[str]):
+    """Call the embeddings API, trying the known client call shapes"""
+    try:
+        try:
+            return client.models.embed_content(model=model_name, contents=texts)
+        except TypeError:
+            # some client versions use 'input' instead of 'contents'
+            return client.models.embed_content(model=model_name, input=texts)
+    except Exception as e:
+        # If embed_content fails, try the older embeddings.create surface if present
+        if hasattr(client, 'embeddings') and hasattr(client.embeddings, 'create'):
+            try:
+                return client.embeddings.create(model=model_name, input=texts)
+            except Exception as e2:
+                log.debug("embeddings.create fallback failed: %s", e2)
+        raise e
+
+
+def _parse_embeddings(resp) -> List[List[float]]:
+    """Normalize known response shapes to a list of float lists"""
+    vecs: List[List[float]] = []
+    # Preferred: resp.embeddings (google.genai EmbedContentResponse)
+    if hasattr(resp, 'embeddings') and resp.embeddings:
+        for item in resp.embeddings:
+            vals = getattr(item, 'values', None) or getattr(item, 'embedding', None)
+            if vals is None and hasattr(item, '__dict__'):
+                vals = item.__dict__.get('values') or item.__dict__.get('embedding')
+            if vals is None:
+                continue
+            vecs.append(list(vals))
+
+    # Older shape: resp.data -> list of items with .embedding or ['embedding']
+    elif hasattr(resp, 'data') and resp.data:
+        for item in resp.data:
+            emb = getattr(item, 'embedding', None) or (item.get('embedding') if isinstance(item, dict) else None)
+            if emb is None:
+                emb = getattr(item, 'value', None) or (item.get('value') if isinstance(item, dict) else None)
+            if emb is None:
+                continue
+            vecs.append(list(emb))
+
+    # Dict-like: {'embeddings': [{'embedding': [...]}, ...]}
+    elif isinstance(resp, dict) and 'embeddings' in resp:
+        for item in resp['embeddings']:
+            if isinstance(item, dict) and 'embedding' in item:
+                vecs.append(list(item['embedding']))
+
+    else:
+        # Last resort: try to introspect common attributes
+        embeddings = getattr(resp, 'embeddings', None) or getattr(resp, 'embedding', None) or getattr(resp, 'data', None)
+        if embeddings:
+            for item in embeddings:
+                vals = getattr(item, 'values', None) or getattr(item, 'embedding', None) or (item.get('embedding') if isinstance(item, dict) else None)
+                if vals:
+                    vecs.append(list(vals))
+    return vecs
+
+
+def resolve_embedding_model() -> str:
+    """Resolve the embedding model dynamically (tries env, cached, and fallback candidates)"""
+    model_name = get_embedding_model(preferred=os.getenv("EMBEDDING_MODEL"))
+    if not model_name:
+        raise RuntimeError("No embedding model available")
+    return model_name
+
+
+class EmbeddingClient:
+    """Embeds texts through the cloud API in concurrent, retried batches"""
+
+    def __init__(
+        self,
+        batch_size: int = EMBED_BATCH_SIZE,
+        concurrency: int = EMBED_CONCURRENCY,
+        max_retries: int = EMBED_MAX_RETRIES,
+        base_delay: float = 0.5,
+        max_delay: float = 10.0,
+    ):
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._texts = 0
+        self._batches = 0
+        self._retries = 0
+        self._failures = 0
+        self._seconds = 0.0
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="embed")
+        return self._pool
+
+    def embed(self, texts: List[str], model_name: Optional[str] = None) -> List[List[float]]:
+        """Return one vector per input text, in input order"""
+        if not texts:
+            return []
+        client = get_genai_client()
+        if client is None:
+            raise RuntimeError("No cloud client configured for embeddings")
+        model_name = model_name or resolve_embedding_model()
+
+        started = time.perf_counter()
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if len(batches) == 1:
+            results = [self._embed_batch(client, model_name, batches[0])]
+        else:
+            # map() preserves batch order
+            results = list(self._get_pool().map(
+                lambda batch: self._embed_batch(client, model_name, batch), batches
+            ))
+        vecs = [vec for batch_vecs in results for vec in batch_vecs]
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._texts += len(texts)
+            self._batches += len(batches)
+            self._seconds += elapsed
+        log.debug("embedded %d texts in %d batches (%.2fs)", len(texts), len(batches), elapsed)
+        return vecs
+
+    def _embed_batch(self, client, model_name: str, batch: List[str]) -> List[List[float]]:
+        attempt = 0
+        while True:
+            try:
+                vecs = _parse_embeddings(_request_embeddings(client, model_name, batch))
+                if len(vecs) != len(batch):
+                    raise RuntimeError(f"expected {len(batch)} embeddings, got {len(vecs)}")
+                return vecs
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_transient(e):
+                    with self._lock:
+                        self._failures += 1
+                    log.error("Cloud embeddings call failed after %d attempts: %s", attempt + 1, e)
+                    raise RuntimeError("Cloud embeddings call failed: %s" % e) from e
+                # Full jitter exponential backoff
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+                attempt += 1
+                with self._lock:
+                    self._retries += 1
+                log.warning("Transient embeddings error (attempt %d, retry in %.2fs): %s", attempt, delay, e)
+                time.sleep(delay)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "texts": self._texts,
+                "batches": self._batches,
+                "retries": self._retries,
+                "failures": self._failures,
+                "seconds": round(self._seconds, 3),
+                "texts_per_second": round(self._texts / self._seconds, 1) if self._seconds else 0.0,
+            }
+
+
+_embedding_client: Optional[EmbeddingClient] = None
+
+
+def get_embedding_client() -> EmbeddingClient:
+    """Return the process-wide embedding client"""
+    global _embedding_client
+    if _embedding_client is None:
+        _embedding_client = EmbeddingClient()
+    return _embedding_client
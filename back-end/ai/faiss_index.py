@@ -0,0 +1,118 @@
+"""FAISS index type selection.
+
+Small documents get an exact ``Flat`` index; large ones get an approximate
+``HNSW`` (latency target) or trained ``IVF-PQ`` (memory target) index. The
+chosen configuration is a plain dict persisted in the index's ``meta.json`` so
+that loading restores the metric, vector normalization and search parameters.
+"""
+from __future__ import annotations
+
+import logging
+import math
+
+from core.config import (
+    FAISS_METRIC,
+    FAISS_INDEX_TARGET,
+    FAISS_FLAT_MAX_VECTORS,
+    FAISS_HNSW_M,
+    FAISS_HNSW_EF_CONSTRUCTION,
+    FAISS_HNSW_EF_SEARCH,
+    FAISS_IVF_NPROBE,
+    FAISS_PQ_MAX_TRAIN,
+)
+
+from core.lazy import lazy_import
+
+log = logging.getLogger("ai-summary.faiss_index")
+
+# Imported on first use (see core.lazy)
+faiss = lazy_import("faiss")
+np = lazy_import("numpy")
+
+# Configuration assumed for indexes persisted before it was recorded
+LEGACY_INDEX_SPEC = {"factory": "Flat", "metric": "l2", "normalize": False, "params": {}}
+
+# IVF training wants roughly this many points per centroid
+_IVF_POINTS_PER_LIST = 39
+_PQ_SUBQUANTIZERS = (64, 48, 32, 24, 16, 12, 8, 4)
+
+
+def _pq_subquantizers(dim: int) -> int | None:
+    """Largest supported PQ sub-quantizer count dividing `dim` (sub-vectors of >= 4 dims)"""
+    for m in _PQ_SUBQUANTIZERS:
+        if dim % m == 0 and dim // m >= 4:
+            return m
+    return None
+
+
+def choose_index_spec(n: int, dim: int, target: str | None = None, metric: str | None = None) -> dict:
+    """Pick an index configuration for `n` vectors of dimension `dim`.
+
+    `target` is "latency" (HNSW), "memory" (IVF-PQ) or "balanced" (HNSW up to
+    ten times the Flat limit, IVF-PQ beyond). `metric` is "l2" or "cosine"
+    (normalized vectors searched by inner product).
+    """
+    target = (target or FAISS_INDEX_TARGET).lower()
+    metric = (metric or FAISS_METRIC).lower()
+    spec = {
+        "metric": "ip" if metric == "cosine" else "l2",
+        "normalize": metric == "cosine",
+    }
+
+    if n <= FAISS_FLAT_MAX_VECTORS:
+        return {**spec, "factory": "Flat", "params": {}}
+
+    use_pq = target == "memory" or (target == "balanced" and n > FAISS_FLAT_MAX_VECTORS * 10)
+    m = _pq_subquantizers(dim) if use_pq else None
+    if m is not None:
+        nlist = int(4 * math.sqrt(n))
+        nlist = max(1, min(nlist, n // _IVF_POINTS_PER_LIST))
+        return {
+            **spec,
+            "factory": f"IVF{nlist},PQ{m}x8",
+            "params": {"nprobe": min(nlist, FAISS_IVF_NPROBE)},
+        }
+    if use_pq:
+        log.info("no PQ layout fits dim=%d; using HNSW instead", dim)
+
+    return {
+        **spec,
+        "factory": f"HNSW{FAISS_HNSW_M}",
+        "params": {"efSearch": FAISS_HNSW_EF_SEARCH},
+    }
+
+
+def prepare_vectors(arr, spec: dict):
+    """Return float32 vectors ready for `spec` (L2-normalized copy for cosine indexes)"""
+    arr = np.ascontiguousarray(arr, dtype="float32")
+    if spec.get("normalize"):
+        arr = arr.copy()
+        faiss.normalize_L2(arr)
+    return arr
+
+
+def build_index(arr, spec: dict):
+    """Create, train (if needed) and fill an index for the prepared vectors `arr`"""
+    metric = faiss.METRIC_INNER_PRODUCT if spec["metric"] == "ip" else faiss.METRIC_L2
+    index = faiss.index_factory(arr.shape[1], spec["factory"], metric)
+    if spec["factory"].startswith("HNSW"):
+        index.hnsw.efConstruction = FAISS_HNSW_EF_CONSTRUCTION
+    if not index.is_trained:
+        sample = arr
+        if len(arr) > FAISS_PQ_MAX_TRAIN:
+            rng = np.random.default_rng(0)
+            sample = arr[rng.choice(len(arr), FAISS_PQ_MAX_TRAIN, replace=False)]
+        index.train(sample)
+    index.add(arr)
+    apply_search_params(index, spec)
+    return index
+
+
+def apply_search_params(index, spec: dict) -> None:
+    """Set query-time parameters (efSearch / nprobe) recorded in `spec`"""
+    params = spec.get("params") or {}
+    if not params:
+        return
+    space = faiss.ParameterSpace()
+    for name, value in params.items():
+        space.set_index_parameter(index, name, value)
@@ -0,0 +1,136 @@
+"""Process-wide registry of loaded FAISS indexes.
+
+Every `VectorStoreManager` (and so every `FaissAdapter`) in the process shares
+this registry, so an index folder is loaded at most once per process. Entries
+are kept in LRU order and evicted once their combined size exceeds the byte
+budget; a per-folder lock makes concurrent first queries wait for a single load.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Tuple
+
+from core.config import INDEX_CACHE_MAX_MB
+
+log = logging.getLogger("ai-summary.index_registry")
+
+
+@dataclass
+class _Entry:
+    value: Any
+    nbytes: int
+    last_access: float
+    version: Any = None
+
+
+class IndexRegistry:
+    """Byte-bounded LRU of loaded indexes keyed by index folder path"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._hits = 0
+        self._loads = 0
+        self._evictions = 0
+        self._prefetches = 0
+
+    def _lookup(self, key: str, version: Any = None):
+        """Return a resident, current entry and mark it used (caller holds `_lock`)"""
+        entry = self._entries.get(key)
+        if entry is None or (version is not None and entry.version != version):
+            return None
+        self._entries.move_to_end(key)
+        entry.last_access = time.time()
+        self._hits += 1
+        return entry
+
+    def get(self, key: str, load: Callable[[], Tuple[Any, int]], version: Any = None):
+        """Return the index for `key`, calling `load() -> (value, nbytes)` on a miss.
+
+        A resident entry loaded under a different `version` (e.g. the mtime of a
+        file rewritten by another worker or by a progressive build) is reloaded.
+        """
+        with self._lock:
+            entry = self._lookup(key, version)
+            if entry is not None:
+                return entry.value
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                # another thread may have finished loading while we waited
+                entry = self._lookup(key, version)
+                if entry is not None:
+                    return entry.value
+            value, nbytes = load()
+            with self._lock:
+                self._store(key, value, nbytes, version)
+                self._load_locks.pop(key, None)
+            return value
+
+    def prefetch(self, key: str, load: Callable[[], Tuple[Any, int]], version: Any = None) -> None:
+        """(Re)load `key` now, replacing a stale resident copy (e.g. after a rebuild)"""
+        value, nbytes = load()
+        with self._lock:
+            self._store(key, value, nbytes, version)
+            self._prefetches += 1
+
+    def _store(self, key: str, value: Any, nbytes: int, version: Any = None) -> None:
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.nbytes
+        self._entries[key] = _Entry(value=value, nbytes=nbytes, last_access=time.time(), version=version)
+        self._bytes += nbytes
+        self._loads += 1
+        # evict least recently used indexes, never the one just loaded
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            cold_key, cold = self._entries.popitem(last=False)
+            self._bytes -= cold.nbytes
+            self._evictions += 1
+            log.info(f"Unloaded index {cold_key} ({cold.nbytes} bytes) to stay under budget")
+
+    def cache_entries(self):
+        """Yield (key, last_access, bytes) for resident indexes (janitor hook)"""
+        with self._lock:
+            items = [(key, e.last_access, e.nbytes) for key, e in self._entries.items()]
+        yield from items
+
+    def evict(self, key: str) -> None:
+        """Unload an index; it is reloaded from disk on the next query"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry.nbytes
+                self._evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "resident": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "loads": self._loads,
+                "prefetches": self._prefetches,
+                "evictions": self._evictions,
+            }
+
+
+_registry: IndexRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def get_index_registry() -> IndexRegistry:
+    """Get the process-wide index registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = IndexRegistry(max_bytes=INDEX_CACHE_MAX_MB * 1024 * 1024)
+        return _registry
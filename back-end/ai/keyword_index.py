@@ -0,0 +1,155 @@
+"""BM25 keyword index over index chunks, with Arabic normalization.
+
+Built at extraction time from the same chunks as the vector index (so chunk ids
+line up), persisted as ``keywords.json`` in the index folder, and fused with
+FAISS results by reciprocal rank fusion. Available as soon as extraction
+finishes, before the (slower) vector index is ready.
+
+The file records the chunk count, chunk boundaries (digest) and chunker version
+it was built over; `matches` rejects it next to a chunk store written by
+another build.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from core.config import BM25_K1, BM25_B, RRF_K
+from ai.chunk_store import boundaries_digest
+from ai.chunking import CHUNKER_VERSION
+
+KEYWORDS_FILE = "keywords.json"
+
+_DIACRITICS_RE = re.compile(r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")
+_ARABIC_FOLD = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ى": "ي", "ئ": "ي",
+    "ؤ": "و",
+    "ة": "ه",
+})
+_WORD_RE = re.compile(r"\w+")
+# Definite article (with a leading conjunction/preposition) stripped from longer words
+_ARTICLE_RE = re.compile(r"^(?:وال|فال|بال|كال|لل|ال)(?=\w{2,})")
+
+# Frequent function words, already normalized
+_STOPWORDS = frozenset(
+    "في من الي علي عن ان او ثم مع هذا هذه ذلك تلك التي الذي الذين هو هي هم كان كانت "
+    "لا ما لم لن قد كل بين حتي اذا عند منذ كما ايضا و ف ب ل ك "
+    "the a an of to in on and or is are was were be for with as by at from this that it".split()
+)
+
+
+def normalize_arabic(text: str) -> str:
+    """Unify letter variants and drop diacritics/tatweel so spelling variants match"""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return _DIACRITICS_RE.sub("", text).translate(_ARABIC_FOLD)
+
+
+def tokenize(text: str) -> List[str]:
+    """Normalized search terms of `text` (stopwords and the definite article removed)"""
+    terms = []
+    for word in _WORD_RE.findall(normalize_arabic(text)):
+        if word in _STOPWORDS:
+            continue
+        stripped = _ARTICLE_RE.sub("", word)
+        # stopwords that start with the article ("التي") also come prefixed ("والتي")
+        if stripped != word and "ال" + stripped in _STOPWORDS:
+            continue
+        if len(stripped) > 1 and stripped not in _STOPWORDS:
+            terms.append(stripped)
+    return terms
+
+
+class KeywordIndex:
+    """Inverted index with BM25 scoring; documents are chunk ids 0..n-1"""
+
+    def __init__(
+        self,
+        postings: Dict[str, List[Tuple[int, int]]],
+        doc_lens: List[int],
+        boundaries: Optional[str] = None,
+        chunker: Optional[str] = None,
+    ):
+        self.postings = postings
+        self.doc_lens = doc_lens
+        self.avg_len = (sum(doc_lens) / len(doc_lens)) if doc_lens else 0.0
+        self.boundaries = boundaries  # digest of the indexed chunks' boundaries
+        self.chunker = chunker
+
+    @classmethod
+    def build(cls, texts: Iterable[str]) -> "KeywordIndex":
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        doc_lens: List[int] = []
+        byte_lengths: List[int] = []
+        for doc_id, text in enumerate(texts):
+            byte_lengths.append(len(text.encode("utf-8")))
+            terms = tokenize(text)
+            doc_lens.append(len(terms))
+            for term, tf in Counter(terms).items():
+                postings[term].append((doc_id, tf))
+        return cls(dict(postings), doc_lens, boundaries_digest(byte_lengths), CHUNKER_VERSION)
+
+    def matches(self, chunks: int, boundaries: str) -> bool:
+        """True if this index was built over a chunk store with these chunks, by the current chunker"""
+        return len(self.doc_lens) == chunks and self.boundaries == boundaries and self.chunker == CHUNKER_VERSION
+
+    def __len__(self) -> int:
+        return len(self.doc_lens)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[int, float]]:
+        """Top `k` (chunk id, BM25 score) for `query`"""
+        n = len(self.doc_lens)
+        if not n:
+            return []
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lens[doc_id] / (self.avg_len or 1))
+                scores[doc_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def save(self, folder: Path) -> None:
+        path = Path(folder) / KEYWORDS_FILE
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(
+            json.dumps({
+                "chunks": len(self.doc_lens),
+                "boundaries": self.boundaries,
+                "chunker": self.chunker,
+                "doc_lens": self.doc_lens,
+                "postings": self.postings,
+            }, ensure_ascii=False, separators=(",", ":")),
+            encoding="utf-8",
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, folder: Path) -> "KeywordIndex":
+        data = json.loads((Path(folder) / KEYWORDS_FILE).read_text(encoding="utf-8"))
+        postings = {term: [tuple(p) for p in plist] for term, plist in data["postings"].items()}
+        return cls(postings, data["doc_lens"], data.get("boundaries"), data.get("chunker"))
+
+    @property
+    def nbytes(self) -> int:
+        """Rough resident size (postings dominate)"""
+        return 64 * sum(len(p) for p in self.postings.values()) + 80 * len(self.postings) + 8 * len(self.doc_lens)
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int | None = None) -> List[int]:
+    """Fuse ranked id lists: score(id) = sum over lists of 1 / (k + rank)"""
+    k = RRF_K if k is None else k
+    scores: Dict[int, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
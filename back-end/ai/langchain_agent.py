@@ -3,32 +3,56 @@
 يدعم البحث في الوثائق، إنشاء الملخصات، والإجابة على الأسئلة
 """
 import logging
+import sys
+import time
 from typing import List, Optional, Dict, Any, AsyncIterator
 from pathlib import Path
 
-# محاولة استيراد LangChain components
+# مكونات LangChain تُستورد عند أول استخدام (استيرادها بطيء ويؤخر تشغيل العامل)
 ChatGoogleGenerativeAI = None
 HumanMessage = None
 AIMessage = None
 SystemMessage = None
 ConversationBufferMemory = None
+LANGCHAIN_AVAILABLE: Optional[bool] = None  # None: لم تتم محاولة الاستيراد بعد
 
-try:
-    from langchain_google_genai import ChatGoogleGenerativeAI
-    from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-    from langchain.memory import ConversationBufferMemory
-    LANGCHAIN_AVAILABLE = True
-except ImportError as e:
-    logging.warning(f"LangChain dependencies not fully available: {e}")
-    LANGCHAIN_AVAILABLE = False
+
+def load_langchain() -> bool:
+    """استيراد مكونات LangChain عند أول استخدام؛ هل هي متاحة؟"""
+    global ChatGoogleGenerativeAI, HumanMessage, AIMessage, SystemMessage, ConversationBufferMemory
+    global LANGCHAIN_AVAILABLE
+    if LANGCHAIN_AVAILABLE is None:
+        try:
+            from langchain_google_genai import ChatGoogleGenerativeAI
+            from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+            from langchain.memory import ConversationBufferMemory
+            LANGCHAIN_AVAILABLE = True
+        except ImportError as e:
+            logging.warning(f"LangChain dependencies not fully available: {e}")
+            LANGCHAIN_AVAILABLE = False
+    return LANGCHAIN_AVAILABLE
 
 from core.infra import get_genai_client, get_embedding_model
+from core.streaming import stream_generate_text
 from core.services import AgentService
 from uploads.config import DEFAULT_MODEL
+from ai.chunking import chunk_document
+from ai.keyword_index import KeywordIndex
 
 log = logging.getLogger("ai-summary.langchain_agent")
 
 
+def _can_retrieve(agent_service: AgentService, session_id: str) -> bool:
+    """هل يوجد فهرس (متجهي أو كلمات مفتاحية) للوثيقة؟"""
+    adapter = getattr(agent_service, "adapter", None)
+    if not adapter:
+        return False
+    if adapter.has_index(session_id):
+        return True
+    has_keywords = getattr(adapter, "has_keyword_index", None)
+    return bool(has_keywords and has_keywords(session_id))
+
+
 class LangChainAgent:
     """وكيل LangChain الذكي للتعامل مع الوثائق"""
     
@@ -37,8 +61,9 @@ class LangChainAgent:
         self.model = model
         self.llm = None
         self.memory: Dict[str, Any] = {}  # memory لكل session
+        self._memory_access: Dict[str, float] = {}  # آخر استخدام لكل memory (للتنظيف)
         
-        if not LANGCHAIN_AVAILABLE:
+        if not load_langchain():
             log.warning("LangChain not available, agent will use fallback mode")
             return
             
@@ -55,6 +80,7 @@ class LangChainAgent:
     
     def _get_memory(self, session_id: str) -> Any:
         """الحصول على أو إنشاء memory للجلسة"""
+        self._memory_access[session_id] = time.time()
         if session_id not in self.memory:
             if ConversationBufferMemory:
                 try:
@@ -76,18 +102,16 @@ class LangChainAgent:
                          core_text: Optional[str] = None) -> str:
         """البحث في الوثيقة"""
         try:
-            if agent_service.adapter and agent_service.adapter.has_index(session_id):
+            if _can_retrieve(agent_service, session_id):
                 results = agent_service.retrieve(session_id, query, k=5)
                 if results:
                     return "\n\n---\n\n".join(results)
-            # إذا لم يكن هناك فهرس، استخدم النص الأساسي
+            # إذا لم يكن هناك فهرس، ابحث في النص الأساسي بفهرس BM25 مؤقت
             if core_text:
-                # بحث بسيط في النص
-                query_lower = query.lower()
-                lines = core_text.split('\n')
-                relevant = [line for line in lines if query_lower in line.lower()][:5]
-                if relevant:
-                    return "\n\n".join(relevant)
+                chunks = [c.text for c in chunk_document(text=core_text)]
+                hits = KeywordIndex.build(chunks).search(query, 5)
+                if hits:
+                    return "\n\n---\n\n".join(chunks[doc_id] for doc_id, _ in hits)
             return "لم أجد معلومات متعلقة بهذا السؤال في الوثيقة."
         except Exception as e:
             log.error(f"Search error: {e}")
@@ -100,7 +124,7 @@ class LangChainAgent:
         try:
             # محاولة استخدام البحث أولاً
             retrieved = None
-            if session_id and agent_service.adapter and agent_service.adapter.has_index(session_id):
+            if session_id and _can_retrieve(agent_service, session_id):
                 try:
                     retrieved = agent_service.retrieve(session_id, query, k=5)
                 except Exception as e:
@@ -150,17 +174,10 @@ class LangChainAgent:
                     prompt = f"""{system_prompt}
                     {user_prompt}"""
                     
-                    stream = client.models.generate_content_stream(
-                        model=self.model,
-                        contents=[prompt]
-                    )
-                    
                     full_response = ""
-                    for chunk in stream:
-                        token = getattr(chunk, "text", None)
-                        if token:
-                            full_response += token
-                            yield token
+                    async for token in stream_generate_text(client, model=self.model, contents=[prompt]):
+                        full_response += token
+                        yield token
                     
                     # حفظ في memory
                     memory = self._get_memory(session_id)
@@ -260,6 +277,47 @@ class LangChainAgent:
         """مسح memory للجلسة"""
         if session_id in self.memory:
             del self.memory[session_id]
+        self._memory_access.pop(session_id, None)
+    
+    def memory_entries(self):
+        """(session_id, آخر استخدام, الحجم التقريبي) لكل memory"""
+        for session_id, memory in list(self.memory.items()):
+            if hasattr(memory, 'chat_memory'):
+                messages = memory.chat_memory.messages
+            elif isinstance(memory, dict):
+                messages = memory.get('messages', [])
+            else:
+                messages = []
+            size = sum(
+                sys.getsizeof(m.get('content', '') if isinstance(m, dict) else getattr(m, 'content', ''))
+                for m in messages
+            )
+            yield session_id, self._memory_access.get(session_id, 0.0), size
+
+
+# وكلاء مخزنون لكل نموذج حتى تبقى ذاكرة المحادثة بين الطلبات
+_agents: Dict[str, LangChainAgent] = {}
+
+
+class ChatMemoryEvictionTarget:
+    """ذاكرات المحادثة لكل الوكلاء كما يراها منظف الذاكرة (janitor)"""
+    
+    def cache_entries(self):
+        for model, agent in list(_agents.items()):
+            for session_id, last_access, size in agent.memory_entries():
+                yield f"{model}|{session_id}", last_access, size
+    
+    def evict(self, key: str) -> None:
+        model, _, session_id = key.partition("|")
+        agent = _agents.get(model)
+        if agent is not None:
+            agent.clear_memory(session_id)
+
+
+def clear_session_memory(session_id: str) -> None:
+    """مسح ذاكرة الجلسة لدى كل الوكلاء المخزنين"""
+    for agent in list(_agents.values()):
+        agent.clear_memory(session_id)
 
 
 def get_langchain_agent(api_key: Optional[str] = None, model: str = DEFAULT_MODEL) -> Optional[LangChainAgent]:
@@ -280,7 +338,11 @@ def get_langchain_agent(api_key: Optional[str] = None, model: str = DEFAULT_MODE
             log.warning("No API key available for LangChain agent")
             return None
         
-        return LangChainAgent(api_key=api_key, model=model)
+        agent = _agents.get(model)
+        if agent is None or agent.api_key != api_key:
+            agent = LangChainAgent(api_key=api_key, model=model)
+            _agents[model] = agent
+        return agent
     except Exception as e:
         log.error(f"Failed to create LangChain agent: {e}")
         return None
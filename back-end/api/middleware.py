@@ -0,0 +1,47 @@
+"""
+ASGI middleware for the API layer
+"""
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+# Allowance for multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """Reject upload bodies larger than `max_body_size` while they are still arriving.
+
+    Requests announcing a too large `Content-Length` are refused before any byte
+    of the body is read; chunked bodies are cut off as soon as the running total
+    passes the limit, so an oversized upload is never fully buffered or spooled.
+    """
+
+    def __init__(self, app, max_body_size: int, paths: tuple = ("/upload",)):
+        self.app = app
+        self.max_body_size = max_body_size + MULTIPART_OVERHEAD
+        self.paths = set(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_body_size:
+            response = JSONResponse({"detail": "File too large."}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    # Re-raised by FastAPI's body parsing and rendered as a 413
+                    raise HTTPException(status_code=413, detail="File too large.")
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -4,7 +4,10 @@ API Routes - Presentation Layer
 """
 import uuid
 import asyncio
+import hashlib
 import time
+from dataclasses import replace
+from datetime import datetime
 from pathlib import Path
 from typing import AsyncGenerator, Optional
 
@@ -17,22 +20,33 @@ from application.dependencies import (
     get_lesson_agent_use_case,
     get_chat_agent_use_case,
     get_session_repository,
+    get_document_repository,
+    get_cache_repository,
     get_index_status_repository,
     get_vector_store_repository,
-    get_agent_service
+    get_agent_service,
+    get_janitor,
+    get_warmup
 )
 from application.use_cases import PDFExtractionUseCase
-from domain.entities import Session, IndexStatus
+from domain.entities import Session, IndexStatus, SummaryProgress, SummarySection
 from uploads.config import MAX_PDF_SIZE, DEFAULT_MODEL, gemini_models
-from core.config import UPLOAD_DIR, INDEX_ROOT
-from core.infra import get_genai_client
+from core.config import UPLOAD_DIR, INDEX_ROOT, UPLOAD_CHUNK_SIZE, EXTRACTION_WAIT_TIMEOUT, SUMMARY_PIPELINED
+from core.infra import get_genai_client, connection_stats
+from ai.embeddings import get_embedding_client
+from ai.embedding_cache import get_embedding_cache
+from ai.agent import query_embedding_cache
+from ai.index_registry import get_index_registry
+from core.text_cleanup import get_text_cleaner
+from core.jobs import get_job_scheduler
+from core.lazy import load_times
 import logging
 
 log = logging.getLogger("ai-summary.api")
 
 router = APIRouter()
 
-# Global state for pending extractions (will be moved to repository)
+# References to extraction tasks running on this worker (status lives in the session repository)
 pending_extractions: dict[str, asyncio.Task] = {}
 
 # File cleanup
@@ -49,6 +63,32 @@ def _encode_sse_chunk(text: str) -> bytes:
     return (payload + "\n").encode("utf-8")
 
 
+def prune_finished_extractions() -> int:
+    """Drop references to finished extraction tasks (janitor sweeper)"""
+    done = [sid for sid, task in pending_extractions.items() if task.done()]
+    for sid in done:
+        pending_extractions.pop(sid, None)
+    return len(done)
+
+
+async def _is_extracting(session_id: Optional[str]) -> bool:
+    """Whether the session's text is still being extracted (on any worker)"""
+    if not session_id:
+        return False
+    session = await get_session_repository().get(session_id)
+    return bool(session and session.extracting)
+
+
+async def _prioritize_index(session_id: Optional[str]) -> None:
+    """Move a session's queued index build to the high-priority lane (a user is waiting on it)"""
+    if not session_id:
+        return
+    session = await get_session_repository().get(session_id)
+    index_key = session.index_key if session else session_id
+    if get_job_scheduler().promote(index_key):
+        log.info(f"Prioritized index build for {index_key}")
+
+
 def _cleanup_old_files() -> None:
     """Clean up old files"""
     now = time.time()
@@ -60,6 +100,38 @@ def _cleanup_old_files() -> None:
             pass
 
 
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds MAX_PDF_SIZE while it is being written"""
+
+
+async def _save_upload(file: UploadFile, dest: Path) -> tuple[int, str]:
+    """Stream an upload to `dest` in fixed-size chunks.
+
+    Enforces MAX_PDF_SIZE as bytes arrive and computes the SHA-256 digest in the
+    same pass. Returns (size, hex digest); removes the partial file on failure.
+    """
+    loop = asyncio.get_running_loop()
+    digest = hashlib.sha256()
+    size = 0
+    fh = await loop.run_in_executor(None, dest.open, "wb")
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > MAX_PDF_SIZE:
+                raise UploadTooLarge()
+            digest.update(chunk)
+            await loop.run_in_executor(None, fh.write, chunk)
+    except BaseException:
+        fh.close()
+        dest.unlink(missing_ok=True)
+        raise
+    await loop.run_in_executor(None, fh.close)
+    return size, digest.hexdigest()
+
+
 @router.post("/upload")
 async def upload_pdf(file: UploadFile):
     """Upload PDF file and extract text"""
@@ -68,9 +140,8 @@ async def upload_pdf(file: UploadFile):
         if file.content_type not in {"application/pdf", "application/octet-stream"}:
             raise HTTPException(status_code=415, detail="Unsupported file type. Must be PDF.")
         
-        # Read file data
-        data = await file.read()
-        if len(data) > MAX_PDF_SIZE:
+        # Reject early when the spooled size is already known
+        if file.size is not None and file.size > MAX_PDF_SIZE:
             raise HTTPException(status_code=413, detail="File too large.")
         
         # Ensure upload directory exists
@@ -80,10 +151,11 @@ async def upload_pdf(file: UploadFile):
         session_id = str(uuid.uuid4())
         pdf_path = Path(UPLOAD_DIR) / f"{session_id}.pdf"
         
-        # Save file
+        # Save file (streamed in chunks, hashed in the same pass)
         try:
-            loop = asyncio.get_running_loop()
-            await loop.run_in_executor(None, pdf_path.write_bytes, data)
+            size, content_hash = await _save_upload(file, pdf_path)
+        except UploadTooLarge:
+            raise HTTPException(status_code=413, detail="File too large.")
         except PermissionError as e:
             log.error(f"Permission error saving file: {e}")
             raise HTTPException(
@@ -103,15 +175,26 @@ async def upload_pdf(file: UploadFile):
             vector_repo = get_vector_store_repository()
             index_status_repo = get_index_status_repository()
             
+            # Publish the extraction status so any worker can wait on it
+            await get_session_repository().save(Session(
+                session_id=session_id,
+                created_at=datetime.now(),
+                content_hash=content_hash,
+                extracting=True
+            ))
             task = asyncio.create_task(
-                use_case.extract_and_store(session_id, pdf_path, vector_repo, index_status_repo)
+                use_case.extract_and_store(
+                    session_id, pdf_path, vector_repo, index_status_repo, content_hash=content_hash
+                )
             )
             pending_extractions[session_id] = task
+            task.add_done_callback(lambda _t, sid=session_id: pending_extractions.pop(sid, None))
         except Exception as e:
             log.exception(f"Error starting extraction: {e}")
-            # Try to clean up the file
+            # Try to clean up the file and the placeholder session
             try:
                 pdf_path.unlink(missing_ok=True)
+                await get_session_repository().delete(session_id)
             except Exception:
                 pass
             raise HTTPException(
@@ -120,7 +203,7 @@ async def upload_pdf(file: UploadFile):
             )
         
         _cleanup_old_files()
-        log.info(f"Accepted upload session={session_id} size={len(data)/1024:.2f}KB")
+        log.info(f"Accepted upload session={session_id} size={size/1024:.2f}KB sha256={content_hash[:12]}")
         
         return {"session_id": session_id, "characters": 0}
     except HTTPException:
@@ -141,6 +224,30 @@ async def health():
     return {"status": "ok"}
 
 
+@router.get("/ready")
+async def ready():
+    """Readiness check: 503 until the background warm-up has finished"""
+    status = get_warmup().status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@router.get("/stats")
+async def stats():
+    """Runtime counters (caches, pools)"""
+    return {
+        "summary_cache": await get_cache_repository().stats(),
+        "janitor": get_janitor().stats(),
+        "embeddings": get_embedding_client().stats(),
+        "embedding_cache": get_embedding_cache().stats() if get_embedding_cache() else None,
+        "query_embeddings": query_embedding_cache.stats(),
+        "indexes": get_index_registry().stats(),
+        "text_cleanup": get_text_cleaner().stats(),
+        "index_jobs": get_job_scheduler().stats(),
+        "genai_http": connection_stats.stats(),
+        "lazy_imports_ms": load_times(),
+    }
+
+
 @router.get("/models")
 async def models():
     """Get available models"""
@@ -151,6 +258,17 @@ async def models():
 async def delete_session(session_id: str):
     """Delete session"""
     session_repo = get_session_repository()
+    # Index builds no other session shares are cancelled (queued ones never start)
+    index_status_repo = get_index_status_repository()
+    for index_key in get_job_scheduler().release(session_id):
+        status = await index_status_repo.get(index_key)
+        if status and status.status == "pending":
+            status.status = "cancelled"
+            await index_status_repo.set(status)
+    # A registry entry pointing at this session's text would be dead
+    session = await session_repo.get(session_id)
+    if session and session.content_hash:
+        await get_document_repository().forget_source(session.content_hash, session_id)
     removed = await session_repo.delete(session_id)
     return JSONResponse({"removed": removed})
 
@@ -168,16 +286,24 @@ async def summarize_gemini(
         try:
             use_case = get_summary_use_case()
             
-            # Check if extraction is pending
-            if session_id in pending_extractions:
+            # Check if extraction is pending; pipelined summaries start on the pages extracted so far
+            summary = use_case.generate_summary
+            if await _is_extracting(session_id):
                 yield b"event: status\ndata: EXTRACTING\n\n"
-                try:
-                    await pending_extractions[session_id]
-                except Exception:
-                    pass
+                if SUMMARY_PIPELINED:
+                    summary = use_case.generate_summary_progressive
+                else:
+                    await get_session_repository().wait_until_extracted(session_id, EXTRACTION_WAIT_TIMEOUT)
             
             # Generate summary
-            async for token in use_case.generate_summary(session_id, model, language):
+            async for token in summary(session_id, model, language):
+                if isinstance(token, SummaryProgress):
+                    yield f"event: progress\ndata: {token.done}/{token.total}\n\n".encode("utf-8")
+                    continue
+                if isinstance(token, SummarySection):
+                    data = "\n".join(f"data: {line}" for line in token.text.split("\n"))
+                    yield f"event: section\nid: {token.index}\n{data}\n\n".encode("utf-8")
+                    continue
                 yield _encode_sse_chunk(token)
             
             yield b"event: status\ndata: DONE\n\n"
@@ -206,13 +332,11 @@ async def lesson_agent(
         yield b"event: status\ndata: START\n\n"
         try:
             use_case = get_lesson_agent_use_case()
+            await _prioritize_index(session_id)
             
             # Wait for extraction if pending
-            if session_id and session_id in pending_extractions:
-                try:
-                    await pending_extractions[session_id]
-                except Exception:
-                    pass
+            if await _is_extracting(session_id):
+                await get_session_repository().wait_until_extracted(session_id, EXTRACTION_WAIT_TIMEOUT)
             
             async for token in use_case.generate_lesson(session_id, q, model, language):
                 yield _encode_sse_chunk(token)
@@ -230,13 +354,28 @@ async def lesson_agent(
 async def get_index_status(session_id: str):
     """Get index status"""
     index_status_repo = get_index_status_repository()
-    status = await index_status_repo.get(session_id)
+    # Sessions of the same document share one index
+    session = await get_session_repository().get(session_id)
+    index_key = session.index_key if session else session_id
+    status = await index_status_repo.get(index_key)
+    if status is None and get_vector_store_repository().has_index(index_key):
+        # Finished statuses are evicted by the janitor; the index itself is on disk
+        status = IndexStatus(session_id=index_key, status="ready")
     if status is None:
         return JSONResponse({"status": "not_found"}, status_code=404)
-    return JSONResponse({
-        "status": status.status,
-        "info": {"chunks": status.chunks} if status.chunks else {}
-    })
+    # Live queue position and progress from the build scheduler
+    scheduler = get_job_scheduler()
+    job = scheduler.get(index_key)
+    if job is not None:
+        status = replace(status, queue_position=scheduler.position(index_key), progress=job.progress)
+    info = {}
+    if status.chunks:
+        info["chunks"] = status.chunks
+    if status.queue_position is not None:
+        info["queue_position"] = status.queue_position
+    if status.progress is not None:
+        info["progress"] = round(status.progress, 3)
+    return JSONResponse({"status": status.status, "info": info})
 
 
 @router.get("/chat")
@@ -251,13 +390,11 @@ async def chat_agent(
         yield b"event: status\ndata: START\n\n"
         try:
             use_case = get_chat_agent_use_case()
+            await _prioritize_index(session_id)
             
             # Wait for extraction if pending
-            if session_id and session_id in pending_extractions:
-                try:
-                    await pending_extractions[session_id]
-                except Exception:
-                    pass
+            if await _is_extracting(session_id):
+                await get_session_repository().wait_until_extracted(session_id, EXTRACTION_WAIT_TIMEOUT)
             
             async for token in use_case.chat(session_id, q, model):
                 yield _encode_sse_chunk(token)
@@ -274,9 +411,7 @@ async def chat_agent(
 @router.delete("/chat/{session_id}")
 async def clear_chat_memory(session_id: str):
     """Clear chat memory"""
-    from ai.langchain_agent import get_langchain_agent
-    agent = get_langchain_agent()
-    if agent:
-        agent.clear_memory(session_id)
+    from ai.langchain_agent import clear_session_memory
+    clear_session_memory(session_id)
     return JSONResponse({"cleared": True})
 
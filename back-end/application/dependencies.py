@@ -7,13 +7,18 @@ from typing import Optional
 
 from domain.repositories import (
     SessionRepository,
+    DocumentRepository,
     CacheRepository,
     VectorStoreRepository,
     IndexStatusRepository
 )
 from infrastructure.repositories import (
     InMemorySessionRepository,
+    FileSessionRepository,
+    InMemoryDocumentRepository,
+    FileDocumentRepository,
     InMemoryCacheRepository,
+    SQLiteCacheRepository,
     FAISSVectorStoreRepository,
     InMemoryIndexStatusRepository
 )
@@ -23,31 +28,99 @@ from application.use_cases import (
     LessonAgentUseCase,
     ChatAgentUseCase
 )
-from core.config import INDEX_ROOT
-from pathlib import Path
+from core.config import (
+    INDEX_ROOT,
+    SUMMARY_CACHE_TTL,
+    SUMMARY_CACHE_MAX_ENTRIES,
+    SUMMARY_CACHE_MAX_BYTES,
+    CACHE_EXPIRY_INTERVAL,
+    CACHE_BACKEND,
+    CACHE_DB_PATH,
+    SUMMARY_CACHE_DB_MAX_BYTES,
+    SUMMARY_CACHE_DB_MAX_ENTRIES,
+    SESSION_BACKEND,
+    SESSION_STORE_ROOT,
+    EXTRACTION_POLL_INTERVAL,
+    MEMORY_BUDGET_MB,
+    JANITOR_INTERVAL,
+    SESSION_IDLE_TTL,
+    INDEX_IDLE_TTL,
+    INDEX_STATUS_TTL,
+    CHAT_MEMORY_IDLE_TTL,
+    TEXT_CLEANUP,
+    WARMUP_TIMEOUT,
+    WARMUP_PREFETCH_INDEXES
+)
 from core.services import AgentService
+from core.pdf_extractor import PDFTextExtractor
+from core.janitor import Janitor
+from core.text_cleanup import get_text_cleaner
+from core.jobs import get_job_scheduler
+from core.warmup import Warmup, WarmupSkipped
+from core.infra import get_genai_client, prime_genai_model
+from core.lazy import preload
+from uploads.config import DEFAULT_MODEL
+from ai.langchain_agent import ChatMemoryEvictionTarget
+from ai.index_registry import get_index_registry
 
 # Global instances (singleton pattern)
 _session_repo: Optional[SessionRepository] = None
+_document_repo: Optional[DocumentRepository] = None
 _cache_repo: Optional[CacheRepository] = None
 _vector_repo: Optional[VectorStoreRepository] = None
 _index_status_repo: Optional[IndexStatusRepository] = None
 _agent_service: Optional[AgentService] = None
+_pdf_extractor: Optional[PDFTextExtractor] = None
+_janitor: Optional[Janitor] = None
+_warmup: Optional[Warmup] = None
 
 
 def get_session_repository() -> SessionRepository:
     """Get session repository instance"""
     global _session_repo
     if _session_repo is None:
-        _session_repo = InMemorySessionRepository()
+        if SESSION_BACKEND == "file":
+            # Visible to every uvicorn worker
+            _session_repo = FileSessionRepository(
+                SESSION_STORE_ROOT,
+                poll_interval=EXTRACTION_POLL_INTERVAL
+            )
+        else:
+            _session_repo = InMemorySessionRepository()
     return _session_repo
 
 
+def get_document_repository() -> DocumentRepository:
+    """Get document registry instance"""
+    global _document_repo
+    if _document_repo is None:
+        if SESSION_BACKEND == "file":
+            _document_repo = FileDocumentRepository(SESSION_STORE_ROOT)
+        else:
+            _document_repo = InMemoryDocumentRepository()
+    return _document_repo
+
+
 def get_cache_repository() -> CacheRepository:
     """Get cache repository instance"""
     global _cache_repo
     if _cache_repo is None:
-        _cache_repo = InMemoryCacheRepository(default_ttl=600)
+        if CACHE_BACKEND == "sqlite":
+            # Shared by all uvicorn workers and kept across restarts
+            _cache_repo = SQLiteCacheRepository(
+                CACHE_DB_PATH,
+                default_ttl=SUMMARY_CACHE_TTL,
+                max_entries=SUMMARY_CACHE_DB_MAX_ENTRIES,
+                max_bytes=SUMMARY_CACHE_DB_MAX_BYTES,
+                expiry_interval=CACHE_EXPIRY_INTERVAL
+            )
+        else:
+            _cache_repo = InMemoryCacheRepository(
+                default_ttl=SUMMARY_CACHE_TTL,
+                max_entries=SUMMARY_CACHE_MAX_ENTRIES,
+                max_bytes=SUMMARY_CACHE_MAX_BYTES,
+                expiry_interval=CACHE_EXPIRY_INTERVAL
+            )
     return _cache_repo
 
 
@@ -79,10 +152,94 @@ def get_agent_service() -> AgentService:
     return _agent_service
 
 
+def get_pdf_extractor() -> PDFTextExtractor:
+    """Get PDF text extractor (owns the extraction process pool)"""
+    global _pdf_extractor
+    if _pdf_extractor is None:
+        _pdf_extractor = PDFTextExtractor()
+    return _pdf_extractor
+
+
+def get_janitor() -> Janitor:
+    """Get the memory janitor, with every in-process store registered"""
+    global _janitor
+    if _janitor is None:
+        _janitor = Janitor(memory_budget=MEMORY_BUDGET_MB * 1024 * 1024, interval=JANITOR_INTERVAL)
+        _janitor.register("sessions", get_session_repository(), idle_ttl=SESSION_IDLE_TTL)
+        _janitor.register("index_statuses", get_index_status_repository(), idle_ttl=INDEX_STATUS_TTL)
+        _janitor.register("indexes", get_index_registry(), idle_ttl=INDEX_IDLE_TTL)
+        _janitor.register("chat_memories", ChatMemoryEvictionTarget(), idle_ttl=CHAT_MEMORY_IDLE_TTL)
+        document_repo = get_document_repository()
+        if isinstance(document_repo, InMemoryDocumentRepository):
+            # entries would outlive their source sessions, which expire like this
+            _janitor.register("documents", document_repo, idle_ttl=SESSION_IDLE_TTL)
+    return _janitor
+
+
+def _warm_modules() -> str:
+    """Import the heavy dependencies that are loaded lazily (see core.lazy)"""
+    import core.infra
+    import ai.agent
+    from ai.langchain_agent import load_langchain
+    preload([core.infra.genai, core.infra.httpx, ai.agent.faiss, ai.agent.np])
+    return "langchain" if load_langchain() else "langchain unavailable"
+
+
+def _warm_client() -> str:
+    if get_genai_client() is None:
+        raise WarmupSkipped("no API key")
+    return "pooled client ready"
+
+
+def _warm_embeddings() -> str:
+    from ai.embedders import CloudEmbedder, get_embedder
+    embedder = get_embedder()
+    if isinstance(embedder, CloudEmbedder) and get_genai_client() is None:
+        raise WarmupSkipped("no API key")
+    embedder.embed_query("تمهيد")
+    return embedder.name
+
+
+def _warm_llm() -> str:
+    if not prime_genai_model(DEFAULT_MODEL):
+        raise WarmupSkipped("no API key")
+    return DEFAULT_MODEL
+
+
+def _warm_indexes() -> str:
+    vector_repo = get_vector_store_repository()
+    registry = get_index_registry()
+    loaded = 0
+    for key in vector_repo.recent_index_keys(WARMUP_PREFETCH_INDEXES):
+        # loading more than the registry holds would only evict the first ones again
+        if registry.stats()["bytes"] >= registry.max_bytes:
+            break
+        vector_repo.prefetch(key)
+        loaded += 1
+    return f"{loaded} prefetched"
+
+
+def get_warmup() -> Warmup:
+    """Get the background warm-up, with every step registered"""
+    global _warmup
+    if _warmup is None:
+        _warmup = Warmup(timeout=WARMUP_TIMEOUT)
+        _warmup.register("modules", _warm_modules)
+        _warmup.register("genai_client", _warm_client)
+        _warmup.register("embedding_model", _warm_embeddings)
+        _warmup.register("llm", _warm_llm)
+        _warmup.register("indexes", _warm_indexes)
+    return _warmup
+
+
 def get_pdf_extraction_use_case() -> PDFExtractionUseCase:
     """Get PDF extraction use case"""
     return PDFExtractionUseCase(
-        session_repo=get_session_repository()
+        session_repo=get_session_repository(),
+        document_repo=get_document_repository(),
+        extractor=get_pdf_extractor(),
+        cleaner=get_text_cleaner() if TEXT_CLEANUP else None,
+        scheduler=get_job_scheduler()
     )
 
 
@@ -5,48 +5,186 @@ Application Layer - Use Cases
 import asyncio
 import hashlib
 import logging
-from typing import AsyncIterator, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
 from pathlib import Path
 from datetime import datetime
 
-from domain.entities import Session, IndexStatus
+from domain.entities import Session, IndexStatus, Document, SummaryProgress, SummarySection
 from domain.repositories import (
+    ExtractionFailed,
     SessionRepository,
+    DocumentRepository,
     CacheRepository,
     VectorStoreRepository,
-    IndexStatusRepository
+    IndexStatusRepository,
+    IndexBuilder
 )
 from core.infra import get_genai_client
+from core.pdf_extractor import PDFTextExtractor
+from core.text_cleanup import TextCleaner
+from core.jobs import Job, JobCancelled, JobScheduler, get_job_scheduler
+from core.streaming import stream_generate_text
 from ai.agent import build_lesson_prompt, stream_agent_response
 from ai.langchain_agent import get_langchain_agent
 from uploads.config import DEFAULT_MODEL
+from core.config import (
+    SUMMARY_MAP_REDUCE_THRESHOLD,
+    SUMMARY_SECTION_CHARS,
+    SUMMARY_MAP_CONCURRENCY,
+    SUMMARY_CACHE_TTL,
+    EXTRACTION_WAIT_TIMEOUT,
+    PROGRESSIVE_INDEXING
+)
 
 log = logging.getLogger("ai-summary.use_cases")
 
+# Bump whenever the summary prompts change so stale cached summaries are not served
+SUMMARY_PROMPT_VERSION = "2"
+
+# Queued to a progressive index build when extraction fails
+_ABORT_INDEX = object()
+
+
+def split_sections(text: str, max_chars: int) -> List[str]:
+    """Split text into sections of at most `max_chars`, preferring line boundaries"""
+    sections: List[str] = []
+    current: List[str] = []
+    size = 0
+    for line in text.split("\n"):
+        # Hard-split lines that alone exceed the budget
+        while len(line) > max_chars:
+            if current:
+                sections.append("\n".join(current))
+                current, size = [], 0
+            sections.append(line[:max_chars])
+            line = line[max_chars:]
+        if size + len(line) + 1 > max_chars and current:
+            sections.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        sections.append("\n".join(current))
+    return [section for section in sections if section.strip()]
+
+
+def take_section(buffer: str, max_chars: int) -> Tuple[str, str]:
+    """Cut one section of at most `max_chars` off the front of `buffer` at a line
+    boundary; returns (section, rest)"""
+    cut = buffer.rfind("\n", 0, max_chars + 1)
+    if cut <= 0:
+        return buffer[:max_chars], buffer[max_chars:]
+    return buffer[:cut], buffer[cut + 1:]
+
 
 class PDFExtractionUseCase:
     """Use case for extracting text from PDF files"""
     
-    def __init__(self, session_repo: SessionRepository):
+    def __init__(
+        self,
+        session_repo: SessionRepository,
+        document_repo: DocumentRepository,
+        extractor: PDFTextExtractor,
+        cleaner: Optional[TextCleaner] = None,
+        scheduler: Optional[JobScheduler] = None
+    ):
         self.session_repo = session_repo
+        self.document_repo = document_repo
+        self.extractor = extractor
+        self.cleaner = cleaner
+        self.scheduler = scheduler or get_job_scheduler()
+    
+    async def extract_pages(self, pdf_path: Path) -> List[str]:
+        """Extract the text of each PDF page (runs on the extraction process pool)"""
+        return [page async for batch in self.iter_pages(pdf_path) for page in batch]
+    
+    async def iter_pages(self, pdf_path: Path) -> AsyncIterator[List[str]]:
+        """Yield page batches in order as soon as each is extracted.
+
+        Pages are cleaned of headers/footers, page numbers and layout
+        whitespace when a cleaner is configured; headers found in earlier
+        batches are carried forward.
+        """
+        loop = asyncio.get_running_loop()
+        repeated = frozenset()
+        chars_saved = tokens_saved = removed = 0
+        first = True
+        async for batch in self.extractor.iter_pages(pdf_path):
+            if self.cleaner is not None:
+                result = await loop.run_in_executor(
+                    None, self.cleaner.clean_pages, batch, repeated, first
+                )
+                repeated = result.repeated
+                chars_saved += result.chars_saved
+                tokens_saved += result.tokens_saved
+                removed += result.removed_lines
+                batch = result.pages
+            first = False
+            yield batch
+        if self.cleaner is not None:
+            log.info(
+                f"Cleaned {pdf_path.name}: saved {chars_saved} chars / {tokens_saved} tokens "
+                f"({removed} lines removed)"
+            )
     
     async def extract_text(self, pdf_path: Path) -> str:
         """Extract text from PDF file"""
-        import pypdfium2
-        pdf = pypdfium2.PdfDocument(pdf_path)
-        return "\n".join(page.get_textpage().get_text_range() for page in pdf)
+        return "\n".join(await self.extract_pages(pdf_path))
     
     async def extract_and_store(
         self, 
         session_id: str, 
         pdf_path: Path,
         vector_repo: VectorStoreRepository,
-        index_status_repo: IndexStatusRepository
+        index_status_repo: IndexStatusRepository,
+        content_hash: Optional[str] = None
     ) -> None:
         """Extract text and store in session, then build index in background"""
         try:
-            # Extract text
-            text = await self.extract_text(pdf_path)
+            # Already-seen document: reuse its text, index and cached summaries
+            if content_hash and await self._link_document(
+                session_id, content_hash, vector_repo, index_status_repo
+            ):
+                pdf_path.unlink(missing_ok=True)
+                return
+            
+            # Extract text batch by batch (pages are kept for page-aware index chunks);
+            # with progressive indexing each batch is indexed while later pages extract
+            index_key = content_hash or session_id
+            index_queue = index_job = index_builder = None
+            if PROGRESSIVE_INDEXING:
+                progressive = await self._start_progressive_index(
+                    session_id, index_key, vector_repo, index_status_repo
+                )
+                if progressive is not None:
+                    index_queue, index_job, index_builder = progressive
+            pages: List[str] = []
+            batches: List[List[str]] = []
+            try:
+                async for batch in self.iter_pages(pdf_path):
+                    if not batch:
+                        continue
+                    # Published for summaries that start before extraction finishes
+                    await self.session_repo.append_partial_text(
+                        session_id, ("\n" if pages else "") + "\n".join(batch)
+                    )
+                    pages.extend(batch)
+                    batches.append(batch)
+                    if index_queue is not None:
+                        if index_job.cancel_requested or index_job.state not in ("queued", "running"):
+                            # nobody reads the queue any more; do not keep the pages in it
+                            while not index_queue.empty():
+                                index_queue.get_nowait()
+                            index_queue = None
+                        else:
+                            index_queue.put_nowait(batch)
+            except BaseException:
+                if index_queue is not None:
+                    index_queue.put_nowait(_ABORT_INDEX)
+                raise
+            if index_queue is not None:
+                index_queue.put_nowait(None)
+            text = "\n".join(pages)
             
             # Delete temporary PDF file
             try:
@@ -59,16 +197,44 @@ class PDFExtractionUseCase:
                 session_id=session_id,
                 text=text or "",
                 created_at=datetime.now(),
-                extracted=True
+                extracted=True,
+                content_hash=content_hash
             )
             await self.session_repo.save(session)
             
             log.info(f"Extracted text for {session_id} (chars={len(text or '')})")
             
-            # Build index in background
+            if text and content_hash:
+                await self.document_repo.save(Document(
+                    document_id=content_hash,
+                    source_session_id=session_id,
+                    characters=len(text),
+                    created_at=session.created_at,
+                    page_lengths=[len(page) for page in pages]
+                ))
+            
+            # Keyword index first: cheap, and searchable while the vector index builds
+            # (a progressive build chunks the same batches, so its chunk ids line up)
             if text:
-                asyncio.create_task(
-                    self._build_index_background(session_id, text, vector_repo, index_status_repo)
+                try:
+                    loop = asyncio.get_running_loop()
+                    if index_builder is not None:
+                        await loop.run_in_executor(None, index_builder.write_keywords, batches)
+                    else:
+                        await loop.run_in_executor(
+                            None, vector_repo.build_keyword_index, session.index_key, text, pages
+                        )
+                except Exception as e:
+                    log.warning(f"Keyword index build failed for {session_id}: {e}")
+            
+            # The progressive job builds the vector index
+            if index_job is not None:
+                return
+            
+            # Queue the index build
+            if text:
+                await self._build_index_background(
+                    session.index_key, text, vector_repo, index_status_repo, pages=pages, owner=session_id
                 )
         except Exception as e:
             log.exception(f"Failed to extract text for {session_id}: {e}")
@@ -77,47 +243,188 @@ class PDFExtractionUseCase:
                 session_id=session_id,
                 text="",
                 created_at=datetime.now(),
-                extracted=False
+                extracted=False,
+                content_hash=content_hash
             )
             await self.session_repo.save(session)
     
-    async def _build_index_background(
+    async def _start_progressive_index(
         self,
         session_id: str,
-        text: str,
+        index_key: str,
         vector_repo: VectorStoreRepository,
         index_status_repo: IndexStatusRepository
+    ) -> Optional[Tuple[asyncio.Queue, Job, IndexBuilder]]:
+        """Queue a progressive index build; returns the queue to feed page batches into,
+        the build job (stop feeding once it is cancelled) and its builder.
+
+        Batches wait in the queue until the build job gets a worker. Returns None
+        when the index already exists or is being built, or when progressive
+        builds are unavailable (the whole-document build is used).
+        """
+        existing = await index_status_repo.get(index_key)
+        if (existing and existing.status in ("pending", "building", "ready")) or self.scheduler.get(index_key):
+            # another session of the same document keeps the running build alive
+            self.scheduler.join(index_key, session_id)
+            return None
+        if vector_repo.has_index(index_key):
+            return None
+        try:
+            builder = vector_repo.open_index_builder(index_key)
+        except Exception as e:
+            log.warning(f"Progressive indexing unavailable for {index_key}: {e}")
+            return None
+        status = IndexStatus(session_id=index_key, status="pending", chunks=0)
+        await index_status_repo.set(status)
+        queue: asyncio.Queue = asyncio.Queue()
+        job = self.scheduler.submit(
+            index_key,
+            lambda job: self._run_progressive_index(job, builder, queue, status, index_status_repo),
+            owner=session_id
+        )
+        return queue, job, builder
+    
+    async def _run_progressive_index(
+        self,
+        job: Job,
+        builder: IndexBuilder,
+        queue: asyncio.Queue,
+        status: IndexStatus,
+        index_status_repo: IndexStatusRepository
     ) -> None:
-        """Build FAISS index in background"""
+        """Feed extracted page batches to `builder`, publishing the chunk count as it grows"""
         try:
-            # Mark as pending
-            status = IndexStatus(
-                session_id=session_id,
-                status="pending"
-            )
+            status.status = "building"
             await index_status_repo.set(status)
-            
+            while True:
+                batch = await queue.get()
+                if batch is None:
+                    break
+                if batch is _ABORT_INDEX:
+                    await self.scheduler.run_blocking(builder.discard)
+                    raise RuntimeError("extraction failed")
+                job.check_cancelled()
+                status.chunks = await self.scheduler.run_blocking(builder.add_pages, batch)
+                await index_status_repo.set(status)
+            job.check_cancelled()
+            status.chunks = await self.scheduler.run_blocking(builder.finish)
+            if not status.chunks:
+                raise RuntimeError("document has no text to index")
+            status.status = "ready"
+            await index_status_repo.set(status)
+            log.info(f"Index built progressively for {status.session_id} (chunks={status.chunks})")
+        except (asyncio.CancelledError, JobCancelled):
+            status.status = "cancelled"
+            await index_status_repo.set(status)
+            # drop the partial index and keywords written so far
+            await self.scheduler.run_blocking(builder.discard)
+            raise
+        except Exception as e:
+            log.exception(f"Progressive index build failed for {status.session_id}: {e}")
+            status.status = "failed"
+            status.error = str(e)
+            await index_status_repo.set(status)
+            # drop the partial vectors; the keywords written at the end of extraction stay
+            await self.scheduler.run_blocking(builder.abandon)
+            raise  # counted as a failed job
+    
+    async def _link_document(
+        self,
+        session_id: str,
+        content_hash: str,
+        vector_repo: VectorStoreRepository,
+        index_status_repo: IndexStatusRepository
+    ) -> bool:
+        """Link a new session to an already extracted document with the same content"""
+        document = await self.document_repo.get(content_hash)
+        if document is None:
+            return False
+        source = await self.session_repo.get(document.source_session_id)
+        if source is None or not source.text:
+            # Source session is gone; extract again and re-register
+            await self.document_repo.delete(content_hash)
+            return False
+        await self.session_repo.save(Session(
+            session_id=session_id,
+            text=source.text,
+            created_at=datetime.now(),
+            extracted=True,
+            content_hash=content_hash
+        ))
+        # Join the document's running build, or rebuild an index that failed,
+        # was cancelled or is missing on disk
+        await self._build_index_background(
+            content_hash, source.text, vector_repo, index_status_repo,
+            pages=document.split_pages(source.text), owner=session_id
+        )
+        log.info(f"Linked session {session_id} to document {content_hash[:12]} (chars={len(source.text)})")
+        return True
+    
+    async def _build_index_background(
+        self,
+        session_id: str,
+        text: str,
+        vector_repo: VectorStoreRepository,
+        index_status_repo: IndexStatusRepository,
+        pages: Optional[List[str]] = None,
+        owner: Optional[str] = None
+    ) -> None:
+        """Queue a FAISS index build (`session_id` is the session's index key,
+        `owner` the session whose deletion cancels the build)"""
+        # Index already built or being built for this document
+        existing = await index_status_repo.get(session_id)
+        if (existing and existing.status in ("pending", "building")) or self.scheduler.get(session_id):
+            if owner:
+                self.scheduler.join(session_id, owner)
+            return
+        if vector_repo.has_index(session_id):
+            if existing is None or existing.status != "ready":
+                await index_status_repo.set(IndexStatus(session_id=session_id, status="ready"))
+            return
+        
+        # Mark as pending until the job gets a worker
+        status = IndexStatus(session_id=session_id, status="pending")
+        await index_status_repo.set(status)
+        self.scheduler.submit(
+            session_id,
+            lambda job: self._run_index_build(job, status, text, vector_repo, index_status_repo, pages),
+            owner=owner
+        )
+    
+    async def _run_index_build(
+        self,
+        job: Job,
+        status: IndexStatus,
+        text: str,
+        vector_repo: VectorStoreRepository,
+        index_status_repo: IndexStatusRepository,
+        pages: Optional[List[str]] = None
+    ) -> None:
+        """Build the index on the scheduler's thread pool (runs as a scheduler job)"""
+        session_id = status.session_id
+        try:
             # Mark as building
             status.status = "building"
             await index_status_repo.set(status)
             
-            # Build index in executor (blocking operation)
-            loop = asyncio.get_running_loop()
-            await loop.run_in_executor(None, vector_repo.build_index, session_id, text)
+            # Build index (blocking operation)
+            await self.scheduler.run_blocking(vector_repo.build_index, session_id, text, pages, job.set_progress)
             
             # Mark as ready
             status.status = "ready"
             await index_status_repo.set(status)
             
             log.info(f"Index built successfully for {session_id}")
+        except (asyncio.CancelledError, JobCancelled):
+            status.status = "cancelled"
+            await index_status_repo.set(status)
+            raise
         except Exception as e:
             log.exception(f"Index build failed for {session_id}: {e}")
-            status = IndexStatus(
-                session_id=session_id,
-                status="failed",
-                error=str(e)
-            )
+            status.status = "failed"
+            status.error = str(e)
             await index_status_repo.set(status)
+            raise  # counted as a failed job
 
 
 class SummaryUseCase:
@@ -133,12 +440,9 @@ class SummaryUseCase:
     
     async def wait_for_text(self, session_id: str) -> str:
         """Wait for text extraction to complete"""
-        session = await self.session_repo.get(session_id)
+        session = await self.session_repo.wait_until_extracted(session_id, EXTRACTION_WAIT_TIMEOUT)
         if session and session.text:
             return session.text
-        
-        # Check if there's a pending task (would need to be stored in repo)
-        # For now, return empty if not found
         return ""
     
     async def generate_summary(
@@ -146,8 +450,13 @@ class SummaryUseCase:
         session_id: str,
         model: Optional[str] = None,
         language: str = "العربية"
-    ) -> AsyncIterator[str]:
-        """Generate summary with caching"""
+    ) -> AsyncIterator[Union[str, SummaryProgress]]:
+        """Generate summary with caching.
+
+        Texts longer than SUMMARY_MAP_REDUCE_THRESHOLD are summarized hierarchically:
+        sections are summarized concurrently (yielding `SummaryProgress` events),
+        then a final pass over the partial summaries is streamed token by token.
+        """
         # Get text
         text = await self.wait_for_text(session_id)
         if not text or not text.strip():
@@ -155,7 +464,8 @@ class SummaryUseCase:
             return
         
         # Check cache
-        cache_key = self.cache_repo.generate_key(text)
+        model_key = model or DEFAULT_MODEL
+        cache_key = self.cache_repo.generate_key(text, model_key, language, SUMMARY_PROMPT_VERSION)
         cached = await self.cache_repo.get(cache_key)
         if cached:
             log.info(f"Cache hit for summary {cache_key[:8]}")
@@ -166,8 +476,6 @@ class SummaryUseCase:
             return
         
         # Generate summary
-        prompt = self._build_prompt(text)
-        model_key = model or DEFAULT_MODEL
         client = get_genai_client()
         
         if not client:
@@ -177,24 +485,200 @@ class SummaryUseCase:
         # Stream response and collect for caching
         full_response = ""
         try:
-            stream = client.models.generate_content_stream(
-                model=model_key,
-                contents=[prompt]
-            )
-            for chunk in stream:
-                token = getattr(chunk, "text", None)
-                if token:
-                    full_response += token
-                    yield token
+            if len(text) > SUMMARY_MAP_REDUCE_THRESHOLD:
+                sections = split_sections(text, SUMMARY_SECTION_CHARS)
+                partials: List[str] = []
+                async for progress in self._map_sections(client, model_key, sections, partials):
+                    yield progress
+                prompt = self._build_prompt("\n\n".join(partials), from_sections=True)
+            else:
+                prompt = self._build_prompt(text)
+            
+            async for token in stream_generate_text(client, model=model_key, contents=[prompt]):
+                full_response += token
+                yield token
             
             # Cache the result
-            await self.cache_repo.set(cache_key, full_response, ttl=600)
+            await self.cache_repo.set(cache_key, full_response, ttl=SUMMARY_CACHE_TTL)
+        except Exception as e:
+            log.exception(f"Summary generation error: {e}")
+            yield f"❌ حدث خطأ: {str(e)}"
+    
+    async def _map_sections(
+        self,
+        client,
+        model_key: str,
+        sections: List[str],
+        partials: List[str]
+    ) -> AsyncIterator[SummaryProgress]:
+        """Summarize sections concurrently into `partials` (in section order)"""
+        total = len(sections)
+        partials[:] = [""] * total
+        semaphore = asyncio.Semaphore(max(1, SUMMARY_MAP_CONCURRENCY))
+        
+        async def summarize(i: int, section: str) -> None:
+            async with semaphore:
+                prompt = self._build_section_prompt(section, i + 1, total)
+                tokens = [t async for t in stream_generate_text(client, model=model_key, contents=[prompt])]
+            partials[i] = f"### القسم {i + 1}\n" + "".join(tokens)
+        
+        tasks = [asyncio.create_task(summarize(i, section)) for i, section in enumerate(sections)]
+        try:
+            yield SummaryProgress(done=0, total=total)
+            for done, fut in enumerate(asyncio.as_completed(tasks), start=1):
+                await fut
+                yield SummaryProgress(done=done, total=total)
+        finally:
+            for task in tasks:
+                task.cancel()
+        log.info(f"Map phase summarized {total} sections")
+    
+    async def generate_summary_progressive(
+        self,
+        session_id: str,
+        model: Optional[str] = None,
+        language: str = "العربية"
+    ) -> AsyncIterator[Union[str, SummaryProgress, SummarySection]]:
+        """Generate summary while the session text is still being extracted.
+
+        Once the extracted text passes SUMMARY_MAP_REDUCE_THRESHOLD, complete
+        sections are summarized as pages arrive (yielding a `SummarySection` as
+        each finishes, and `SummaryProgress` whose total grows with the text);
+        the final pass starts when extraction ends. Sessions that are not being
+        extracted fall back to `generate_summary`.
+        """
+        session = await self.session_repo.get(session_id)
+        if not session or not session.extracting:
+            async for item in self.generate_summary(session_id, model, language):
+                yield item
+            return
+        
+        client = get_genai_client()
+        if not client:
+            yield "❌ تعذر تهيئة العميل"
+            return
+        
+        model_key = model or DEFAULT_MODEL
+        events: asyncio.Queue = asyncio.Queue()
+        partials: Dict[int, str] = {}
+        tasks: List[asyncio.Task] = []
+        semaphore = asyncio.Semaphore(max(1, SUMMARY_MAP_CONCURRENCY))
+        
+        async def summarize(i: int, section: str) -> None:
+            try:
+                async with semaphore:
+                    prompt = self._build_section_prompt(section, i + 1)
+                    tokens = [t async for t in stream_generate_text(client, model=model_key, contents=[prompt])]
+                partials[i] = "".join(tokens)
+                events.put_nowait(SummarySection(index=i + 1, text=partials[i]))
+            except Exception as e:
+                events.put_nowait(e)
+        
+        def launch(section: str) -> None:
+            if section.strip():
+                tasks.append(asyncio.create_task(summarize(len(tasks), section)))
+        
+        async def feed() -> None:
+            # Consume extracted text; cut sections only once the document is known to be long.
+            # Queues the number of launched sections, then the full text (or an exception)
+            received: List[str] = []
+            size = 0
+            buffer = ""
+            try:
+                async for piece in self.session_repo.stream_text(session_id, EXTRACTION_WAIT_TIMEOUT):
+                    received.append(piece)
+                    size += len(piece)
+                    buffer += piece
+                    if size <= SUMMARY_MAP_REDUCE_THRESHOLD:
+                        continue
+                    launched = len(tasks)
+                    while len(buffer) > SUMMARY_SECTION_CHARS:
+                        section, buffer = take_section(buffer, SUMMARY_SECTION_CHARS)
+                        launch(section)
+                    if len(tasks) > launched:
+                        events.put_nowait(len(tasks))
+                if tasks:
+                    for section in split_sections(buffer, SUMMARY_SECTION_CHARS):
+                        launch(section)
+                events.put_nowait("".join(received))
+            except ExtractionFailed:
+                events.put_nowait("")
+            except Exception as e:
+                events.put_nowait(e)
+        
+        feeder = asyncio.create_task(feed())
+        text: Optional[str] = None
+        done = 0
+        full_response = ""
+        try:
+            while text is None or done < len(tasks):
+                event = await events.get()
+                if isinstance(event, Exception):
+                    raise event
+                if isinstance(event, str):
+                    text = event
+                    if not text.strip():
+                        break
+                    if tasks:
+                        yield SummaryProgress(done=done, total=len(tasks))
+                elif isinstance(event, SummarySection):
+                    done += 1
+                    yield event
+                    yield SummaryProgress(done=done, total=len(tasks))
+                else:  # more sections launched
+                    yield SummaryProgress(done=done, total=len(tasks))
+            
+            if not text or not text.strip():
+                yield "❌ لا يوجد نص متاح للتلخيص"
+                return
+            
+            cache_key = self.cache_repo.generate_key(text, model_key, language, SUMMARY_PROMPT_VERSION)
+            if tasks:
+                log.info(f"Pipelined map phase summarized {len(tasks)} sections")
+                prompt = self._build_prompt(
+                    "\n\n".join(f"### القسم {i + 1}\n{partials[i]}" for i in range(len(tasks))),
+                    from_sections=True
+                )
+            else:
+                cached = await self.cache_repo.get(cache_key)
+                if cached:
+                    log.info(f"Cache hit for summary {cache_key[:8]}")
+                    chunk_size = 800
+                    for i in range(0, len(cached), chunk_size):
+                        yield cached[i:i+chunk_size]
+                    return
+                prompt = self._build_prompt(text)
+            
+            async for token in stream_generate_text(client, model=model_key, contents=[prompt]):
+                full_response += token
+                yield token
+            
+            await self.cache_repo.set(cache_key, full_response, ttl=SUMMARY_CACHE_TTL)
         except Exception as e:
             log.exception(f"Summary generation error: {e}")
             yield f"❌ حدث خطأ: {str(e)}"
+        finally:
+            feeder.cancel()
+            for task in tasks:
+                task.cancel()
     
-    def _build_prompt(self, text: str) -> str:
-        """Build prompt for summary generation"""
+    def _build_section_prompt(self, section: str, index: int, total: Optional[int] = None) -> str:
+        """Build prompt for summarizing one section of a long document (`total` may be unknown yet)"""
+        position = f"{index} من {total}" if total else f"{index}"
+        return (
+            f"هذا هو القسم {position} من وثيقة تعليمية طويلة.\n"
+            "لخّص هذا القسم في نقاط مركزة تحفظ جميع الأفكار الرئيسية والمصطلحات والتعريفات والأمثلة المهمة.\n"
+            "لا تكتب مقدمة أو خاتمة، ولا تضف معلومات من خارج النص.\n\n"
+            f"### النص:\n{section}"
+        )
+    
+    def _build_prompt(self, text: str, from_sections: bool = False) -> str:
+        """Build prompt for summary generation (or the reduce pass over section summaries)"""
+        source = (
+            f"### 🧾 ملخصات أقسام النص بالترتيب (اعتمد عليها لتلخيص الوثيقة كاملة):\n{text}"
+            if from_sections
+            else f"### 🧾 النص المراد تلخيصه:\n{text}"
+        )
         return (
             "أنت خبير تربوي ومصمم محتوى أكاديمي متخصص في تحويل النصوص الإسلامية والعلمية إلى دروس تفاعلية جذابة.\n\n"
             "### 🎯 الهدف:\n"
@@ -212,7 +696,7 @@ class SummaryUseCase:
             "5. في نهاية النص، أنشئ قسمًا بعنوان `## أسئلة وأجوبة` يحتوي من 3 إلى 7 أسئلة تدريبية.\n"
             "6. اجعل الأسلوب **تعليميًا مبسطًا** وليس وعظيًا، مع لمسة إيمانية ملهمة.\n"
             "7. لا تكتب أي شروحات إضافية خارج النص.\n\n"
-            f"### 🧾 النص المراد تلخيصه:\n{text}"
+            f"{source}"
         )
 
 
@@ -237,10 +721,12 @@ class LessonAgentUseCase:
         """Generate interactive lesson"""
         # Get core text
         core_text = ""
+        index_key = session_id
         if session_id:
             session = await self.session_repo.get(session_id)
             if session:
                 core_text = session.text or ""
+                index_key = session.index_key
         
         if not core_text and query:
             core_text = query
@@ -249,11 +735,11 @@ class LessonAgentUseCase:
             yield "❌ لا يوجد نص متاح"
             return
         
-        # Retrieve relevant chunks if index exists
+        # Retrieve relevant chunks if index exists (keyword index is ready first)
         retrieved = None
-        if session_id and self.vector_repo.has_index(session_id):
+        if index_key and (self.vector_repo.has_index(index_key) or self.vector_repo.has_keyword_index(index_key)):
             try:
-                retrieved = self.vector_repo.query(session_id, query or core_text, k=4)
+                retrieved = self.vector_repo.query(index_key, query or core_text, k=4)
             except Exception as e:
                 log.warning(f"Retrieval failed: {e}")
         
@@ -285,10 +771,12 @@ class ChatAgentUseCase:
         """Chat with agent"""
         # Get core text
         core_text = ""
+        index_key = session_id
         if session_id:
             session = await self.session_repo.get(session_id)
             if session:
                 core_text = session.text or ""
+                index_key = session.index_key
         
         if not core_text or not core_text.strip():
             yield "❌ لا توجد وثيقة متاحة. يرجى رفع ملف PDF أولاً."
@@ -300,15 +788,20 @@ class ChatAgentUseCase:
             yield "❌ تعذر تهيئة الوكيل الذكي. تأكد من إعدادات API."
             return
         
-        # Create a simple adapter for agent service
+        # Create a simple adapter for agent service (chat memory stays per session,
+        # retrieval goes to the document's shared index)
         class SimpleAgentService:
-            def __init__(self, vector_repo):
+            def __init__(self, vector_repo, index_key):
                 self.adapter = type('Adapter', (), {
-                    'has_index': lambda self, sid: vector_repo.has_index(sid),
-                    'query': lambda self, sid, q, k=4: vector_repo.query(sid, q, k)
+                    'has_index': lambda self, sid: vector_repo.has_index(index_key or sid),
+                    'has_keyword_index': lambda self, sid: vector_repo.has_keyword_index(index_key or sid),
+                    'query': lambda self, sid, q, k=4: vector_repo.query(index_key or sid, q, k)
                 })()
+            
+            def retrieve(self, sid, q, k=4):
+                return self.adapter.query(sid, q, k)
         
-        simple_service = SimpleAgentService(self.vector_repo)
+        simple_service = SimpleAgentService(self.vector_repo, index_key)
         
         # Stream response
         async for token in agent.stream_response(
@@ -18,3 +18,122 @@ DEFAULT_MODEL = os.getenv("gemini_model", "gemini-2.5-flash")
 
 # Frontend
 FRONTEND_ORIGINS = [o.strip() for o in os.getenv("FRONTEND_ORIGINS", "http://localhost:5173").split(',') if o.strip()]
+
+# Streaming bridge: worker threads that drain blocking GenAI streams and the
+# per-stream queue size (chunks buffered before the producer thread waits)
+STREAM_WORKERS = int(os.getenv("STREAM_WORKERS", "32"))
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "16"))
+
+# Background warm-up: /ready reports ready once every step finished or this
+# many seconds passed; how many recently used indexes are loaded ahead of use
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "60"))
+WARMUP_PREFETCH_INDEXES = int(os.getenv("WARMUP_PREFETCH_INDEXES", "8"))
+
+# Cold start: maximum time for `import main` (checked by `python -m core.import_budget`)
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1000"))
+
+# Shared GenAI HTTP connection pool: open connections, idle keep-alive
+# connections and how long an idle connection is kept (seconds)
+GENAI_MAX_CONNECTIONS = int(os.getenv("GENAI_MAX_CONNECTIONS", "64"))
+GENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("GENAI_MAX_KEEPALIVE_CONNECTIONS", "32"))
+GENAI_KEEPALIVE_EXPIRY = float(os.getenv("GENAI_KEEPALIVE_EXPIRY", "120"))
+
+# PDF extraction process pool
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "20"))
+PDF_EXTRACT_TIMEOUT = float(os.getenv("PDF_EXTRACT_TIMEOUT", "180"))
+
+# Uploads are streamed to disk in chunks of this size
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+# Hierarchical (map-reduce) summarization for long documents
+SUMMARY_MAP_REDUCE_THRESHOLD = int(os.getenv("SUMMARY_MAP_REDUCE_THRESHOLD", "60000"))  # chars
+SUMMARY_SECTION_CHARS = int(os.getenv("SUMMARY_SECTION_CHARS", "20000"))
+SUMMARY_MAP_CONCURRENCY = int(os.getenv("SUMMARY_MAP_CONCURRENCY", "4"))
+# Summarize sections while later pages are still being extracted (instead of waiting)
+SUMMARY_PIPELINED = os.getenv("SUMMARY_PIPELINED", "1").lower() not in ("0", "false", "no")
+
+# Summary cache bounds
+SUMMARY_CACHE_TTL = int(os.getenv("SUMMARY_CACHE_TTL", "600"))  # seconds
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "256"))
+SUMMARY_CACHE_MAX_BYTES = int(os.getenv("SUMMARY_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+CACHE_EXPIRY_INTERVAL = int(os.getenv("CACHE_EXPIRY_INTERVAL", "60"))  # seconds
+
+# Summary cache backend: "sqlite" (shared by all workers, survives restarts) or "memory"
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite").strip().lower()
+CACHE_DB_PATH = Path(os.getenv("CACHE_DB_PATH", str(ROOT / "temp" / "cache" / "summaries.sqlite3")))
+SUMMARY_CACHE_DB_MAX_BYTES = int(os.getenv("SUMMARY_CACHE_DB_MAX_BYTES", str(256 * 1024 * 1024)))
+SUMMARY_CACHE_DB_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_DB_MAX_ENTRIES", "10000"))
+
+# Session store: "file" (metadata + extracted text on disk, visible to every worker) or "memory"
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "file").strip().lower()
+SESSION_STORE_ROOT = Path(os.getenv("SESSION_STORE_ROOT", str(ROOT / "temp" / "sessions")))
+# How often a worker re-checks an extraction started by another worker
+EXTRACTION_POLL_INTERVAL = float(os.getenv("EXTRACTION_POLL_INTERVAL", "0.25"))
+# Upper bound for waiting on an extraction, possibly running on another worker
+EXTRACTION_WAIT_TIMEOUT = float(os.getenv("EXTRACTION_WAIT_TIMEOUT", str(PDF_EXTRACT_TIMEOUT + 30)))
+
+# Index builds running at once (further builds wait in the job queue)
+INDEX_JOB_WORKERS = int(os.getenv("INDEX_JOB_WORKERS", "2"))
+
+# Janitor: memory budget for in-process stores and idle TTLs (seconds)
+MEMORY_BUDGET_MB = int(os.getenv("MEMORY_BUDGET_MB", "512"))
+JANITOR_INTERVAL = float(os.getenv("JANITOR_INTERVAL", "60"))
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "3600"))
+INDEX_IDLE_TTL = float(os.getenv("INDEX_IDLE_TTL", "1800"))
+INDEX_STATUS_TTL = float(os.getenv("INDEX_STATUS_TTL", "3600"))
+CHAT_MEMORY_IDLE_TTL = float(os.getenv("CHAT_MEMORY_IDLE_TTL", "3600"))
+
+# Cloud embeddings: texts per request, concurrent requests and retries for transient errors
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "100"))
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "4"))
+
+# Persistent embedding cache keyed by (embedding model, chunk text hash)
+EMBEDDING_CACHE_PATH = Path(os.getenv("EMBEDDING_CACHE_PATH", str(ROOT / "temp" / "cache" / "embeddings.sqlite3")))
+EMBEDDING_CACHE_MAX_ROWS = int(os.getenv("EMBEDDING_CACHE_MAX_ROWS", "500000"))
+
+# Embedder used for new index builds: "cloud" (GenAI API) or "local" (sentence-transformers on CPU).
+# Queries always use the embedder recorded in the index they search.
+EMBEDDER_BACKEND = os.getenv("EMBEDDER_BACKEND", "cloud").strip().lower()
+LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+# sentence-transformers inference backend: "torch", "onnx" or "openvino"
+LOCAL_EMBEDDING_BACKEND = os.getenv("LOCAL_EMBEDDING_BACKEND", "torch").strip().lower()
+# Optional model file for onnx/openvino, e.g. a quantized "onnx/model_qint8_avx512_vnni.onnx"
+LOCAL_EMBEDDING_FILE = os.getenv("LOCAL_EMBEDDING_FILE", "")
+LOCAL_EMBED_BATCH_SIZE = int(os.getenv("LOCAL_EMBED_BATCH_SIZE", "64"))
+LOCAL_EMBED_THREADS = int(os.getenv("LOCAL_EMBED_THREADS", "2"))
+
+# Process-wide LRU of query embeddings (entries)
+QUERY_EMBED_CACHE_SIZE = int(os.getenv("QUERY_EMBED_CACHE_SIZE", "2048"))
+
+# FAISS index selection: "l2" or "cosine" (normalized inner product)
+FAISS_METRIC = os.getenv("FAISS_METRIC", "l2").strip().lower()
+# Above FAISS_FLAT_MAX_VECTORS chunks: "latency" (HNSW), "memory" (IVF-PQ) or "balanced"
+FAISS_INDEX_TARGET = os.getenv("FAISS_INDEX_TARGET", "balanced").strip().lower()
+FAISS_FLAT_MAX_VECTORS = int(os.getenv("FAISS_FLAT_MAX_VECTORS", "20000"))
+FAISS_HNSW_M = int(os.getenv("FAISS_HNSW_M", "32"))
+FAISS_HNSW_EF_CONSTRUCTION = int(os.getenv("FAISS_HNSW_EF_CONSTRUCTION", "80"))
+FAISS_HNSW_EF_SEARCH = int(os.getenv("FAISS_HNSW_EF_SEARCH", "64"))
+FAISS_IVF_NPROBE = int(os.getenv("FAISS_IVF_NPROBE", "16"))
+FAISS_PQ_MAX_TRAIN = int(os.getenv("FAISS_PQ_MAX_TRAIN", "65536"))
+
+# Byte budget of the process-wide registry of loaded FAISS indexes
+INDEX_CACHE_MAX_MB = int(os.getenv("INDEX_CACHE_MAX_MB", "256"))
+
+# Index chunking: token budget per chunk and sentence-aligned overlap between chunks
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "200"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "24"))
+
+# Hybrid retrieval: BM25 parameters and the reciprocal rank fusion constant
+BM25_K1 = float(os.getenv("BM25_K1", "1.5"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+# Strip repeated headers/footers, page numbers and layout whitespace from extracted text
+TEXT_CLEANUP = os.getenv("TEXT_CLEANUP", "1").strip().lower() not in ("0", "false", "no")
+
+# Progressive indexing: embed and index page batches while extraction is still running;
+# the partial index is re-persisted (and so queryable) at most this often (seconds)
+PROGRESSIVE_INDEXING = os.getenv("PROGRESSIVE_INDEXING", "1").strip().lower() not in ("0", "false", "no")
+PROGRESSIVE_PERSIST_INTERVAL = float(os.getenv("PROGRESSIVE_PERSIST_INTERVAL", "2"))
@@ -1,14 +1,16 @@
 from pathlib import Path
 import logging
-from typing import List
+from typing import Callable, List, Optional, Sequence
 
 log = logging.getLogger("ai-summary.faiss_adapter")
 
 try:
-    from ai.agent import VectorStoreManager, build_and_persist_faiss
+    from ai.agent import VectorStoreManager, IncrementalIndexBuilder, build_and_persist_faiss, build_keyword_index
 except Exception:
     VectorStoreManager = None
+    IncrementalIndexBuilder = None
     build_and_persist_faiss = None
+    build_keyword_index = None
 
 
 class FaissAdapter:
@@ -31,11 +33,50 @@ class FaissAdapter:
             return False
         return self._vsm.has_index(key)
 
-    def build_index(self, session_id: str, text: str) -> None:
+    def has_keyword_index(self, key: str) -> bool:
+        if self._vsm is None:
+            return False
+        return self._vsm.has_keyword_index(key)
+
+    def build_keyword_index(self, session_id: str, text: str, pages: Optional[Sequence[str]] = None) -> None:
+        if build_keyword_index is None:
+            log.warning("keyword index build not available in this environment")
+            return
+        build_keyword_index(session_id, text, self.index_root, pages=pages)
+        if self._vsm is not None:
+            self._vsm.prefetch(session_id)
+
+    def build_index(
+        self,
+        session_id: str,
+        text: str,
+        pages: Optional[Sequence[str]] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> None:
         if build_and_persist_faiss is None:
             log.warning("FAISS build not available in this environment")
             return
-        build_and_persist_faiss(session_id, text, self.index_root)
+        build_and_persist_faiss(session_id, text, self.index_root, pages=pages, progress=progress)
+        if self._vsm is not None and self._vsm.has_index(session_id):
+            # load into the shared registry now so the first query is served from memory
+            self._vsm.prefetch(session_id)
+
+    def prefetch(self, key: str) -> None:
+        """Load an index into the shared registry ahead of its first query"""
+        if self._vsm is not None:
+            self._vsm.prefetch(key)
+
+    def recent_keys(self, limit: int) -> List[str]:
+        """Keys of the most recently loaded or built indexes"""
+        if self._vsm is None:
+            return []
+        return self._vsm.recent_keys(limit)
+
+    def open_builder(self, session_id: str):
+        """Start a progressive build; the returned builder takes page batches (`add_pages`, `finish`)"""
+        if IncrementalIndexBuilder is None:
+            raise RuntimeError("FAISS build not available in this environment")
+        return IncrementalIndexBuilder(session_id, self.index_root)
 
     def query(self, key: str, query: str, k: int = 4) -> List[str]:
         if self._vsm is None:
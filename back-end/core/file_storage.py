@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from typing import Optional
 
@@ -15,7 +16,10 @@ class FileStorage:
 
     def save_text(self, session_id: str, text: str) -> str:
         p = self.text_root / f"{session_id}.txt"
-        p.write_text(text, encoding="utf-8")
+        # Write then rename so readers in other processes never see a partial file
+        tmp = p.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, p)
         return str(p)
 
     def read_text(self, session_id: str) -> Optional[str]:
@@ -23,3 +27,6 @@ class FileStorage:
         if not p.exists():
             return None
         return p.read_text(encoding="utf-8")
+
+    def delete_text(self, session_id: str) -> None:
+        (self.text_root / f"{session_id}.txt").unlink(missing_ok=True)
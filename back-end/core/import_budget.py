@@ -0,0 +1,92 @@
+"""Import-time budget check.
+
+Imports the application in a fresh interpreter with ``-X importtime`` and
+reports what it costs, so cold starts stay fast as dependencies grow:
+
+    python -m core.import_budget            # checks `import main`
+    python -m core.import_budget --top 30 --budget-ms 800
+
+Prints the total import time, the slowest top-level packages (cumulative) and
+any heavy dependency that is imported eagerly instead of through `core.lazy`.
+Exits with status 1 when the budget is exceeded or a heavy module is imported.
+"""
+import argparse
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from core.config import IMPORT_BUDGET_MS
+
+# Must only be imported on first use / in the background warm-up
+HEAVY_MODULES = (
+    "google.genai",
+    "faiss",
+    "numpy",
+    "langchain",
+    "langchain_core",
+    "langchain_google_genai",
+    "sentence_transformers",
+    "torch",
+    "pypdfium2",
+)
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+_BACKEND_ROOT = Path(__file__).resolve().parents[1]
+
+
+def measure(module: str = "main") -> List[Tuple[str, int, int, int]]:
+    """(module, self µs, cumulative µs, depth) for every module imported by `import <module>`"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=_BACKEND_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m:
+            self_us, cumulative_us, indent, name = m.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def report(module: str = "main", top: int = 15, budget_ms: float = IMPORT_BUDGET_MS) -> int:
+    rows = measure(module)
+    total_ms = next((cum for name, _, cum, _ in rows if name == module), 0) / 1000
+    # self time summed per top-level package
+    packages: Dict[str, int] = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        packages[name.split(".")[0]] += self_us
+    imported = {name for name, _, _, _ in rows}
+    eager = [heavy for heavy in HEAVY_MODULES if heavy in imported]
+
+    print(f"import {module}: {total_ms:.0f}ms (budget {budget_ms:.0f}ms, {len(rows)} modules)")
+    print(f"{'package':<32}{'ms':>10}")
+    for name, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"{name:<32}{self_us / 1000:>10.1f}")
+    if eager:
+        print("heavy modules imported eagerly (load them through core.lazy): " + ", ".join(eager))
+
+    over = total_ms > budget_ms
+    if over:
+        print(f"over budget by {total_ms - budget_ms:.0f}ms")
+    return 1 if over or eager else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Report per-module import cost against a budget")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    args = parser.parse_args()
+    sys.exit(report(args.module, args.top, args.budget_ms))
+
+
+if __name__ == "__main__":
+    main()
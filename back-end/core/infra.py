@@ -1,33 +1,156 @@
 import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
+from core.config import GENAI_MAX_CONNECTIONS, GENAI_MAX_KEEPALIVE_CONNECTIONS, GENAI_KEEPALIVE_EXPIRY
+from core.lazy import lazy_import
+
 load_dotenv()
 
-try:
-    from google import genai
-except Exception:  # pragma: no cover - optional dependency
-    genai = None
+# Imported when the client is first created (google-genai is slow to import)
+genai = lazy_import("google.genai")
+httpx = lazy_import("httpx")
+
+log = logging.getLogger("ai-summary.infra")
+
+_client = None
+_client_lock = threading.Lock()
+
+
+class _ConnectionStats:
+    """Counts requests and new TCP/TLS connections on the shared HTTP pool (httpcore trace events)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.tls_handshakes = 0
+
+    def on_request(self, request) -> None:
+        with self._lock:
+            self.requests += 1
+        request.extensions["trace"] = self._trace
+
+    def _trace(self, event: str, info: dict) -> None:
+        if event == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections += 1
+        elif event == "connection.start_tls.complete":
+            with self._lock:
+                self.tls_handshakes += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "new_connections": self.connections,
+                "tls_handshakes": self.tls_handshakes,
+                "reused_ratio": round(1 - self.connections / self.requests, 4) if self.requests else 0.0,
+                "max_connections": GENAI_MAX_CONNECTIONS,
+                "max_keepalive_connections": GENAI_MAX_KEEPALIVE_CONNECTIONS,
+            }
+
+
+connection_stats = _ConnectionStats()
+
+
+def _build_http_client():
+    """Pooled keep-alive HTTP client shared by every GenAI call (httpx clients are thread-safe)"""
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=GENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=GENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=GENAI_KEEPALIVE_EXPIRY,
+        ),
+        # per-request timeouts are set by the SDK
+        timeout=None,
+        event_hooks={"request": [connection_stats.on_request]},
+    )
 
 
 def get_genai_client():
-    """Return a genai.Client if API key present, else None.
+    """Return the process-wide genai.Client if API key present, else None.
 
     This centralizes client creation in one place (infrastructure/adapter layer),
-    avoiding import-time failures when the key is missing.
+    avoiding import-time failures when the key is missing. The client is built
+    once and shared by all threads, so its HTTP connections (and TLS sessions)
+    are reused across summaries, embeddings and chat calls.
     """
+    global _client
+    if _client is not None:
+        return _client
     if genai is None:
         return None
     key = os.getenv("Gemnikey", "")
     if not key:
         return None
-    try:
-        return genai.Client(api_key=key)
-    except Exception:
-        return None
+    with _client_lock:
+        if _client is None and httpx is not None:
+            try:
+                http_options = genai.types.HttpOptions(httpx_client=_build_http_client())
+                _client = genai.Client(api_key=key, http_options=http_options)
+            except Exception as e:  # SDK without `httpx_client`: use its own pool
+                log.warning(f"Pooled GenAI HTTP client unavailable, using SDK defaults: {e}")
+        if _client is None:
+            try:
+                _client = genai.Client(api_key=key)
+            except Exception:
+                return None
+    return _client
+
+
+def close_genai_client() -> None:
+    """Close the shared client's pooled connections (called on application shutdown)"""
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    http_client = getattr(getattr(client, "_api_client", None), "_httpx_client", None)
+    if http_client is not None:
+        try:
+            http_client.close()
+        except Exception:
+            pass
+
+
+def prime_genai_model(model: str, prompt: str = "اختبار تمهيدي صغير") -> bool:
+    """Stream the first tokens of a tiny request, so the first real request
+    finds an open connection and a warm model; returns False without a client"""
+    client = get_genai_client()
+    if client is None:
+        return False
+    stream = client.models.generate_content_stream(model=model, contents=[prompt])
+    taken = 0
+    for chunk in stream:
+        if getattr(chunk, "text", None):
+            taken += 1
+        if taken >= 2:
+            break
+    return True
 
 
 # Cache for a chosen embedding model to avoid repeated probing
 _cached_embedding_model: str | None = None
+_probe_lock = threading.Lock()
+
+
+def _probe_embedding_model(client, model_name: str) -> bool:
+    """Whether `model_name` answers a tiny embedding request"""
+    test_input = ["test"]
+    try:
+        # try contents then input forms
+        try:
+            resp = client.models.embed_content(model=model_name, contents=test_input)
+        except TypeError:
+            resp = client.models.embed_content(model=model_name, input=test_input)
+        # check for embeddings presence
+        if hasattr(resp, "embeddings") and resp.embeddings:
+            return True
+        return bool(isinstance(resp, dict) and resp.get("embeddings"))
+    except Exception:
+        # model unsupported or call failed
+        return False
 
 
 def get_embedding_model(preferred: str | None = None) -> str | None:
@@ -46,6 +169,16 @@ def get_embedding_model(preferred: str | None = None) -> str | None:
     if client is None:
         return None
 
+    # one probe at a time; callers arriving meanwhile use its result
+    with _probe_lock:
+        if _cached_embedding_model:
+            return _cached_embedding_model
+        _cached_embedding_model = _probe_candidates(client, preferred)
+        return _cached_embedding_model
+
+
+def _probe_candidates(client, preferred: str | None) -> str | None:
+    """Probe candidate embedding models concurrently; the first working one in order wins"""
     # respect explicit preference if provided
     candidates = []
     if preferred:
@@ -67,23 +200,13 @@ def get_embedding_model(preferred: str | None = None) -> str | None:
         if d not in candidates:
             candidates.append(d)
 
-    test_input = ["test"]
-    for model_name in candidates:
-        try:
-            # try contents then input forms
-            try:
-                resp = client.models.embed_content(model=model_name, contents=test_input)
-            except TypeError:
-                resp = client.models.embed_content(model=model_name, input=test_input)
-            # check for embeddings presence
-            if hasattr(resp, "embeddings") and resp.embeddings:
-                _cached_embedding_model = model_name
-                return _cached_embedding_model
-            if isinstance(resp, dict) and resp.get("embeddings"):
-                _cached_embedding_model = model_name
-                return _cached_embedding_model
-        except Exception:
-            # model unsupported or call failed — try next
-            continue
-
+    pool = ThreadPoolExecutor(max_workers=len(candidates), thread_name_prefix="embed-probe")
+    try:
+        futures = [pool.submit(_probe_embedding_model, client, name) for name in candidates]
+        # preference order: stop at the first working model without waiting for later probes
+        for model_name, future in zip(candidates, futures):
+            if future.result():
+                return model_name
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
     return None
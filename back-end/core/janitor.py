@@ -0,0 +1,158 @@
+"""Memory janitor.
+
+Periodically evicts idle entries from the in-process stores (sessions, index
+statuses, loaded FAISS indexes, chat memories) and, when their combined size
+exceeds the configured memory budget, evicts the least recently used entries
+across all stores until the process is back under budget.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Protocol, Tuple
+
+log = logging.getLogger("ai-summary.janitor")
+
+
+class EvictionTarget(Protocol):
+    """A store the janitor can inspect and evict from"""
+
+    def cache_entries(self) -> Iterable[Tuple[str, float, int]]:
+        """Yield (key, last_access timestamp, approximate bytes) for evictable entries"""
+        ...
+
+    def evict(self, key: str) -> None:
+        """Drop one entry"""
+        ...
+
+
+@dataclass
+class _Registration:
+    target: EvictionTarget
+    idle_ttl: Optional[float]
+    evicted_idle: int = 0
+    evicted_budget: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+
+@dataclass
+class _Sweeper:
+    fn: Callable[[], int]
+    removed: int = 0
+
+
+class Janitor:
+    """Evicts cold entries by idle TTL and, over `memory_budget` bytes, in global LRU order"""
+
+    def __init__(self, memory_budget: int, interval: float = 60.0):
+        self.memory_budget = memory_budget
+        self.interval = interval
+        self._targets: Dict[str, _Registration] = {}
+        self._sweepers: Dict[str, _Sweeper] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._sweeps = 0
+        self._last_sweep_ms = 0.0
+
+    def register(self, name: str, target: EvictionTarget, idle_ttl: Optional[float] = None) -> None:
+        """Register a store; entries idle for longer than `idle_ttl` seconds are evicted"""
+        self._targets[name] = _Registration(target=target, idle_ttl=idle_ttl)
+
+    def register_sweeper(self, name: str, fn: Callable[[], int]) -> None:
+        """Register a cleanup callable run on every sweep (returns how many items it removed)"""
+        self._sweepers[name] = _Sweeper(fn=fn)
+
+    def sweep(self) -> int:
+        """Run one eviction pass and return the number of evicted entries"""
+        started = time.perf_counter()
+        now = time.time()
+        evicted = 0
+
+        for name, sweeper in self._sweepers.items():
+            try:
+                removed = sweeper.fn()
+            except Exception as e:
+                log.warning(f"Janitor sweeper {name} failed: {e}")
+                continue
+            sweeper.removed += removed
+            evicted += removed
+
+        # Idle TTLs, and a snapshot of what stays resident
+        resident: List[Tuple[float, int, str, str]] = []  # (last_access, bytes, target, key)
+        for name, reg in self._targets.items():
+            reg.entries = reg.bytes = 0
+            try:
+                entries = list(reg.target.cache_entries())
+            except Exception as e:
+                log.warning(f"Janitor could not inspect {name}: {e}")
+                continue
+            for key, last_access, size in entries:
+                if reg.idle_ttl is not None and now - last_access > reg.idle_ttl:
+                    reg.target.evict(key)
+                    reg.evicted_idle += 1
+                    evicted += 1
+                    continue
+                reg.entries += 1
+                reg.bytes += size
+                resident.append((last_access, size, name, key))
+
+        # Memory budget, least recently used first across every store
+        total = sum(size for _, size, _, _ in resident)
+        if total > self.memory_budget:
+            resident.sort()
+            for _, size, name, key in resident:
+                if total <= self.memory_budget:
+                    break
+                reg = self._targets[name]
+                reg.target.evict(key)
+                reg.evicted_budget += 1
+                reg.entries -= 1
+                reg.bytes -= size
+                total -= size
+                evicted += 1
+
+        self._sweeps += 1
+        self._last_sweep_ms = (time.perf_counter() - started) * 1000
+        if evicted:
+            log.info(f"Janitor evicted {evicted} entries (resident={total / 1024 / 1024:.1f}MB)")
+        return evicted
+
+    def stats(self) -> dict:
+        return {
+            "memory_budget": self.memory_budget,
+            "resident_bytes": sum(reg.bytes for reg in self._targets.values()),
+            "sweeps": self._sweeps,
+            "last_sweep_ms": round(self._last_sweep_ms, 2),
+            "stores": {
+                name: {
+                    "entries": reg.entries,
+                    "bytes": reg.bytes,
+                    "evicted_idle": reg.evicted_idle,
+                    "evicted_budget": reg.evicted_budget,
+                }
+                for name, reg in self._targets.items()
+            },
+            "sweepers": {name: {"removed": sw.removed} for name, sw in self._sweepers.items()},
+        }
+
+    def start(self) -> None:
+        """Start the periodic sweep on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                log.exception(f"Janitor sweep failed: {e}")
@@ -0,0 +1,266 @@
+"""Bounded background job scheduler (index builds).
+
+Jobs are async callables run by a fixed number of worker tasks; their blocking
+work goes through `run_blocking`, on a thread pool of the same size, so a burst
+of uploads queues up instead of occupying the default executor that request
+handlers use.
+
+- Two lanes, each FIFO: `PRIORITY_HIGH` (a user is waiting, e.g. chatting with
+  a document whose index is still queued) is always dispatched before
+  `PRIORITY_NORMAL`. Queued jobs can be moved to the high lane (`promote`).
+- Jobs are keyed (the index key); submitting a key that is queued or running
+  joins the existing job instead of starting another one.
+- Each job records its owners (session ids). `release(owner)` drops an owner
+  and cancels jobs nobody owns any more. Running jobs are cancelled
+  cooperatively: the asyncio task is cancelled and `check_cancelled` (called
+  from progress callbacks) stops the blocking work at its next checkpoint.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+from core.config import INDEX_JOB_WORKERS
+
+log = logging.getLogger("ai-summary.jobs")
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+_LANES = {PRIORITY_HIGH: "high", PRIORITY_NORMAL: "normal"}
+
+
+class JobCancelled(Exception):
+    """Raised inside a job's blocking work once the job has been cancelled"""
+
+
+@dataclass(eq=False)
+class Job:
+    key: str
+    run: Callable[["Job"], Awaitable[None]]
+    priority: int = PRIORITY_NORMAL
+    owners: Set[str] = field(default_factory=set)
+    submitted_at: float = field(default_factory=time.monotonic)
+    started_at: Optional[float] = None
+    state: str = "queued"  # queued, running, done, failed, cancelled
+    progress: Optional[float] = None  # 0..1 when the job reports it
+    cancel_requested: bool = False
+    task: Optional[asyncio.Task] = None
+
+    def set_progress(self, done: int, total: int) -> None:
+        """Progress callback for blocking work (safe to call from worker threads)"""
+        self.check_cancelled()
+        if total:
+            self.progress = min(1.0, done / total)
+
+    def check_cancelled(self) -> None:
+        if self.cancel_requested:
+            raise JobCancelled(self.key)
+
+
+class JobScheduler:
+    """Runs keyed jobs on `workers` worker tasks, high lane first, FIFO within a lane"""
+
+    def __init__(self, workers: int = 2):
+        self.workers = max(1, workers)
+        self._lanes: Dict[int, Deque[Job]] = {p: deque() for p in _LANES}
+        self._jobs: Dict[str, Job] = {}  # queued or running, by key
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._submitted = 0
+        self._deduplicated = 0
+        self._completed = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._promoted = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+        self._started = 0
+        self._finished = 0
+
+    def start(self) -> None:
+        """Start the worker tasks on the running event loop (idempotent)"""
+        if self._worker_tasks and not all(t.done() for t in self._worker_tasks):
+            return
+        loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._worker_tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel queued and running jobs and stop the workers"""
+        for job in list(self._jobs.values()):
+            self._cancel(job)
+        for task in self._worker_tasks:
+            task.cancel()
+        for task in self._worker_tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._worker_tasks = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def submit(
+        self,
+        key: str,
+        run: Callable[[Job], Awaitable[None]],
+        priority: int = PRIORITY_NORMAL,
+        owner: Optional[str] = None
+    ) -> Job:
+        """Queue `run(job)` under `key`; joins the queued/running job with the same key"""
+        self.start()
+        job = self._jobs.get(key)
+        if job is not None:
+            self._deduplicated += 1
+            if owner:
+                job.owners.add(owner)
+            if priority < job.priority:
+                self.promote(key, priority)
+            return job
+        job = Job(key=key, run=run, priority=priority, owners={owner} if owner else set())
+        self._jobs[key] = job
+        self._lanes[priority].append(job)
+        self._submitted += 1
+        self._wakeup.set()
+        return job
+
+    def join(self, key: str, owner: str) -> bool:
+        """Add an owner to the queued/running job for `key`, if any"""
+        job = self._jobs.get(key)
+        if job is None:
+            return False
+        job.owners.add(owner)
+        return True
+
+    def get(self, key: str) -> Optional[Job]:
+        """The queued or running job for `key`"""
+        return self._jobs.get(key)
+
+    def position(self, key: str) -> Optional[int]:
+        """1-based position of a queued job in dispatch order (None if not queued)"""
+        ahead = 0
+        for priority in sorted(self._lanes):
+            for i, job in enumerate(self._lanes[priority]):
+                if job.key == key:
+                    return ahead + i + 1
+            ahead += len(self._lanes[priority])
+        return None
+
+    def promote(self, key: str, priority: int = PRIORITY_HIGH) -> bool:
+        """Move a queued job to a higher-priority lane (keeps FIFO order within it)"""
+        job = self._jobs.get(key)
+        if job is None or job.state != "queued" or priority >= job.priority:
+            return False
+        self._lanes[job.priority].remove(job)
+        job.priority = priority
+        self._lanes[priority].append(job)
+        self._promoted += 1
+        return True
+
+    def release(self, owner: str) -> List[str]:
+        """Drop `owner` from its jobs; cancels the jobs left without owners and returns their keys"""
+        cancelled = []
+        for job in list(self._jobs.values()):
+            if owner in job.owners:
+                job.owners.discard(owner)
+                if not job.owners:
+                    self._cancel(job)
+                    cancelled.append(job.key)
+        return cancelled
+
+    def cancel(self, key: str) -> bool:
+        job = self._jobs.get(key)
+        if job is None:
+            return False
+        self._cancel(job)
+        return True
+
+    def _cancel(self, job: Job) -> None:
+        job.cancel_requested = True
+        if job.state == "queued":
+            self._lanes[job.priority].remove(job)
+            self._jobs.pop(job.key, None)
+            job.state = "cancelled"
+            self._cancelled += 1
+        elif job.task is not None:
+            job.task.cancel()
+        log.info(f"Cancelled job {job.key}")
+
+    async def run_blocking(self, fn: Callable[..., Any], *args) -> Any:
+        """Run blocking work of a job on the scheduler's thread pool"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="index-job")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _next(self) -> Optional[Job]:
+        for priority in sorted(self._lanes):
+            if self._lanes[priority]:
+                return self._lanes[priority].popleft()
+        return None
+
+    async def _worker(self) -> None:
+        while True:
+            job = self._next()
+            if job is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            job.state = "running"
+            job.started_at = time.monotonic()
+            wait = job.started_at - job.submitted_at
+            self._started += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+            job.task = asyncio.create_task(job.run(job))
+            # asyncio.wait does not raise, so cancelling the job leaves the worker running
+            await asyncio.wait({job.task})
+            self._run_total += time.monotonic() - job.started_at
+            self._finished += 1
+            self._jobs.pop(job.key, None)
+            if job.task.cancelled() or isinstance(job.task.exception(), JobCancelled):
+                job.state = "cancelled"
+                self._cancelled += 1
+            elif job.task.exception() is not None:
+                job.state = "failed"
+                self._failed += 1
+                log.error(f"Job {job.key} failed: {job.task.exception()}")
+            else:
+                job.state = "done"
+                self._completed += 1
+
+    def stats(self) -> dict:
+        running = sum(1 for job in self._jobs.values() if job.state == "running")
+        now = time.monotonic()
+        queued_waits = [now - job.submitted_at for lane in self._lanes.values() for job in lane]
+        return {
+            "workers": self.workers,
+            "running": running,
+            "queued": {name: len(self._lanes[p]) for p, name in _LANES.items()},
+            "submitted": self._submitted,
+            "deduplicated": self._deduplicated,
+            "promoted": self._promoted,
+            "completed": self._completed,
+            "failed": self._failed,
+            "cancelled": self._cancelled,
+            "wait_ms_avg": round(self._wait_total / self._started * 1000, 1) if self._started else 0.0,
+            "wait_ms_max": round(self._wait_max * 1000, 1),
+            "oldest_queued_ms": round(max(queued_waits) * 1000, 1) if queued_waits else 0.0,
+            "run_ms_avg": round(self._run_total / self._finished * 1000, 1) if self._finished else 0.0,
+        }
+
+
+_scheduler: Optional[JobScheduler] = None
+
+
+def get_job_scheduler() -> JobScheduler:
+    """Get the process-wide index build scheduler"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = JobScheduler(workers=INDEX_JOB_WORKERS)
+    return _scheduler
@@ -0,0 +1,81 @@
+"""Lazy imports for heavy optional dependencies.
+
+`lazy_import("faiss")` returns a stand-in that imports the real module on first
+attribute access, or None when the package is not installed (so the existing
+``if faiss is None`` checks keep working). Worker processes therefore start
+without paying for faiss, numpy or google-genai until a request needs them (or
+the background preload loads them). The time each deferred import took is
+recorded for the import budget report (`python -m core.import_budget`).
+"""
+import importlib
+import importlib.util
+import logging
+import threading
+import time
+from types import ModuleType
+from typing import Dict, Iterable, Optional
+
+log = logging.getLogger("ai-summary.lazy")
+
+_load_times: Dict[str, float] = {}  # module -> seconds spent importing it
+_lock = threading.RLock()
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+
+    def _load(self) -> ModuleType:
+        if self._module is None:
+            with _lock:
+                if self._module is None:
+                    started = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    elapsed = time.perf_counter() - started
+                    _load_times[self._name] = elapsed
+                    log.info(f"Loaded {self._name} in {elapsed * 1000:.0f}ms")
+                    self._module = module
+        return self._module
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def _installed(name: str) -> bool:
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def lazy_import(name: str) -> Optional[LazyModule]:
+    """A lazily imported `name`, or None if it is not installed"""
+    return LazyModule(name) if _installed(name) else None
+
+
+def preload(modules: Iterable[Optional[LazyModule]]) -> None:
+    """Import lazy modules now (e.g. from a background thread after startup)"""
+    for module in modules:
+        if module is None:
+            continue
+        try:
+            module._load()
+        except Exception as e:
+            log.warning(f"Preloading {module._name} failed: {e}")
+
+
+def load_times() -> Dict[str, float]:
+    """Milliseconds spent in each deferred import so far"""
+    with _lock:
+        return {name: round(seconds * 1000, 1) for name, seconds in _load_times.items()}
@@ -0,0 +1,121 @@
+"""Process-pool PDF text extraction.
+
+pypdfium2 is CPU bound and holds the GIL, so extraction runs in a dedicated process
+pool instead of on the event loop. Large documents are split into page ranges that
+are extracted in parallel and reassembled in page order.
+"""
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator, List, Optional, Tuple
+
+from core.config import PDF_EXTRACT_WORKERS, PDF_PAGES_PER_TASK, PDF_EXTRACT_TIMEOUT
+
+log = logging.getLogger("ai-summary.pdf_extractor")
+
+
+def _count_pages(pdf_path: str) -> int:
+    import pypdfium2
+    pdf = pypdfium2.PdfDocument(pdf_path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def _extract_page_range(pdf_path: str, start: int, stop: int) -> List[str]:
+    """Extract the text of pages [start, stop) — runs inside a pool process."""
+    import pypdfium2
+    pdf = pypdfium2.PdfDocument(pdf_path)
+    pages: List[str] = []
+    try:
+        for i in range(start, stop):
+            page = pdf[i]
+            textpage = page.get_textpage()
+            try:
+                pages.append(textpage.get_text_range())
+            finally:
+                textpage.close()
+                page.close()
+    finally:
+        pdf.close()
+    return pages
+
+
+def split_page_ranges(page_count: int, pages_per_task: int) -> List[Tuple[int, int]]:
+    """Split `page_count` pages into consecutive [start, stop) ranges."""
+    step = max(1, pages_per_task)
+    return [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+
+
+class PDFTextExtractor:
+    """Extracts PDF text page by page on a lazily created process pool."""
+
+    def __init__(
+        self,
+        max_workers: int = PDF_EXTRACT_WORKERS,
+        pages_per_task: int = PDF_PAGES_PER_TASK,
+        timeout: float = PDF_EXTRACT_TIMEOUT,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.pages_per_task = pages_per_task
+        self.timeout = timeout
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    # spawn: forking a process that already runs threads is unsafe
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._pool
+
+    async def extract_pages(self, pdf_path: Path) -> List[str]:
+        """Return the text of every page, in order.
+
+        Raises `asyncio.TimeoutError` when the whole document takes longer than
+        the configured timeout.
+        """
+        return [page async for batch in self.iter_pages(pdf_path) for page in batch]
+
+    async def iter_pages(self, pdf_path: Path) -> AsyncIterator[List[str]]:
+        """Yield page texts in order, one batch per page range, as soon as each range is ready.
+
+        All ranges are submitted up front, so later pages keep extracting while
+        the caller consumes earlier batches. The configured timeout applies to
+        the whole document.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        pool = self._get_pool()
+        path = str(pdf_path)
+        page_count = await asyncio.wait_for(
+            loop.run_in_executor(pool, _count_pages, path), timeout=self.timeout
+        )
+        ranges = split_page_ranges(page_count, self.pages_per_task)
+        futures = [
+            loop.run_in_executor(pool, _extract_page_range, path, start, stop)
+            for start, stop in ranges
+        ]
+        try:
+            for fut in futures:
+                yield await asyncio.wait_for(asyncio.shield(fut), timeout=max(0.0, deadline - loop.time()))
+        finally:
+            # consumer stopped early, timed out or failed: drop queued ranges
+            for fut in futures:
+                fut.cancel()
+        log.debug("extracted %d pages from %s in %d ranges", page_count, pdf_path, len(ranges))
+
+    def shutdown(self) -> None:
+        """Terminate the worker processes (called on application shutdown)."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
@@ -1,17 +1,55 @@
-from typing import List, Protocol
+from typing import Callable, List, Optional, Protocol, Sequence
 
 
 class VectorStorePort(Protocol):
     def has_index(self, key: str) -> bool:
         ...
 
-    def build_index(self, session_id: str, text: str) -> None:
+    def build_index(
+        self,
+        session_id: str,
+        text: str,
+        pages: Optional[Sequence[str]] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> None:
+        ...
+
+    def has_keyword_index(self, key: str) -> bool:
+        ...
+
+    def build_keyword_index(self, session_id: str, text: str, pages: Optional[Sequence[str]] = None) -> None:
+        ...
+
+    def open_builder(self, session_id: str) -> "IndexBuilderPort":
+        ...
+
+    def prefetch(self, key: str) -> None:
+        ...
+
+    def recent_keys(self, limit: int) -> List[str]:
         ...
 
     def query(self, key: str, query: str, k: int = 4) -> List[str]:
         ...
 
 
+class IndexBuilderPort(Protocol):
+    def add_pages(self, pages: Sequence[str]) -> int:
+        """Index the next pages; return the number of chunks so far"""
+
+    def finish(self) -> int:
+        """Write the final index; return the number of chunks"""
+
+    def write_keywords(self, batches: Sequence[Sequence[str]]) -> int:
+        """Write chunk texts and keywords for all page batches; return the number of chunks"""
+
+    def discard(self) -> None:
+        """Remove what an abandoned build has written"""
+
+    def abandon(self) -> None:
+        """Remove the partial vectors of a failed build, keeping its keywords"""
+
+
 class StoragePort(Protocol):
     def save_text(self, session_id: str, text: str) -> str:
         """Save text and return stored path or identifier"""
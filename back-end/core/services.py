@@ -1,6 +1,6 @@
 from pathlib import Path
 import logging
-from typing import List, Optional
+from typing import Callable, List, Optional, Sequence
 
 from .config import INDEX_ROOT, UPLOAD_DIR
 from .file_storage import FileStorage
@@ -26,8 +26,14 @@ class AgentService:
     def retrieve(self, session_id: str, query: str, k: int = 4) -> List[str]:
         return self.adapter.query(session_id, query, k=k)
 
-    def build_index(self, session_id: str, text: str) -> None:
-        self.adapter.build_index(session_id, text)
+    def build_index(
+        self,
+        session_id: str,
+        text: str,
+        pages: Optional[Sequence[str]] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> None:
+        self.adapter.build_index(session_id, text, pages=pages, progress=progress)
 
     def build_prompt(self, core_text: str, retrieved: Optional[List[str]] = None, language: str = "العربية") -> str:
         return build_lesson_prompt(core_text, retrieved, language)
@@ -0,0 +1,126 @@
+"""Async bridge for blocking GenAI token streams.
+
+`client.models.generate_content_stream(...)` returns a synchronous iterator, so
+consuming it directly inside an `async` generator blocks the event loop on every
+network read. `iterate_in_thread` drains such an iterator on a bounded thread pool
+and hands the items back through a bounded `asyncio.Queue`, which gives each
+stream backpressure without stalling the other requests served by the worker.
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, AsyncIterator, Callable, Iterable, List, Optional
+
+from core.config import STREAM_WORKERS, STREAM_QUEUE_SIZE
+
+log = logging.getLogger("ai-summary.streaming")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# Sentinel marking the end of a stream (optionally carrying the producer error)
+_DONE = object()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=STREAM_WORKERS,
+                    thread_name_prefix="genai-stream",
+                )
+    return _executor
+
+
+def shutdown_stream_executor() -> None:
+    """Stop the stream worker threads (called on application shutdown)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+async def iterate_in_thread(
+    make_iterable: Callable[[], Iterable[Any]],
+    queue_size: int = STREAM_QUEUE_SIZE,
+) -> AsyncIterator[Any]:
+    """Iterate a blocking iterable on the stream pool and yield its items asynchronously.
+
+    `make_iterable` is called on the worker thread, so the request that opens the
+    stream does not block the loop either. When the consumer stops early (client
+    disconnect, `break`), the producer thread notices and closes the iterator.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    def _put(item: tuple) -> bool:
+        # Blocks the worker thread while the queue is full (backpressure), but
+        # gives up once the consumer has gone away.
+        fut = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while True:
+            try:
+                fut.result(timeout=0.5)
+                return True
+            except FutureTimeoutError:
+                if stop.is_set() or loop.is_closed():
+                    fut.cancel()
+                    return False
+
+    def _produce() -> None:
+        iterator = None
+        try:
+            iterator = iter(make_iterable())
+            for item in iterator:
+                if stop.is_set() or not _put((item, None)):
+                    return
+        except BaseException as exc:  # forwarded to the consumer
+            if not stop.is_set():
+                _put((_DONE, exc))
+            return
+        finally:
+            close = getattr(iterator, "close", None)
+            if stop.is_set() and callable(close):
+                try:
+                    close()
+                except Exception:
+                    pass
+        _put((_DONE, None))
+
+    loop.run_in_executor(_get_executor(), _produce)
+    try:
+        while True:
+            item, exc = await queue.get()
+            if item is _DONE:
+                if exc is not None:
+                    raise exc
+                return
+            yield item
+    finally:
+        stop.set()
+        # Free a producer that may be waiting on a full queue
+        while not queue.empty():
+            queue.get_nowait()
+
+
+async def stream_generate_text(
+    client: Any,
+    model: str,
+    contents: List[Any],
+    config: Any = None,
+) -> AsyncIterator[str]:
+    """Stream text tokens from `client.models.generate_content_stream` without blocking the loop."""
+    def _open():
+        kwargs = {"model": model, "contents": contents}
+        if config is not None:
+            kwargs["config"] = config
+        return client.models.generate_content_stream(**kwargs)
+
+    async for chunk in iterate_in_thread(_open):
+        token = getattr(chunk, "text", None)
+        if token:
+            yield token
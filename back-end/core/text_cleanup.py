@@ -0,0 +1,159 @@
+"""Post-extraction text cleanup.
+
+Removes layout noise that PDF extraction leaves in page text and that would
+otherwise be paid for in every summary prompt and index chunk:
+
+- running headers/footers: lines repeated at the top or bottom of many pages
+  (compared with digits masked, so "Chapter 3 - page 12" matches across pages);
+- standalone page numbers ("12", "- 12 -", "صفحة ١٢", "12 / 80");
+- hyphenation at line ends ("infor-\\nmation" -> "information");
+- runs of spaces/tabs and of blank lines.
+
+Pages are cleaned independently (page count and order are kept), so page
+numbers recorded by the chunker stay correct. Documents extracted progressively
+are cleaned batch by batch, carrying the headers/footers found so far forward.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import FrozenSet, Iterable, List, Sequence
+
+from ai.chunking import count_tokens
+
+log = logging.getLogger("ai-summary.text_cleanup")
+
+# Lines at each end of a page that may hold running headers/footers
+EDGE_LINES = 3
+# A header/footer must repeat on at least this share of pages (and on >= 3 pages)
+REPEAT_RATIO = 0.5
+# Longer lines are body text, never headers/footers
+MAX_HEADER_CHARS = 120
+
+_DIGITS_RE = re.compile(r"[0-9\u0660-\u0669\u06f0-\u06f9]+")
+_SPACE_RE = re.compile(r"[ \t\u00a0\u2000-\u200a\u202f\u3000]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_HYPHEN_RE = re.compile(r"([A-Za-z])-\n([a-z])")
+_PAGE_NUMBER_RE = re.compile(
+    r"^[\s\-–—|]*(?:(?:page|p\.|صفحة|الصفحة|ص)\s*)?[0-9\u0660-\u0669\u06f0-\u06f9]{1,4}"
+    r"(?:\s*(?:/|of|من)\s*[0-9\u0660-\u0669\u06f0-\u06f9]{1,4})?[\s\-–—|]*$",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class CleanupResult:
+    pages: List[str]
+    chars_before: int
+    chars_after: int
+    tokens_before: int
+    tokens_after: int
+    removed_lines: int
+    repeated: FrozenSet[str] = frozenset()
+
+    @property
+    def chars_saved(self) -> int:
+        return self.chars_before - self.chars_after
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+def _line_key(line: str) -> str:
+    return _DIGITS_RE.sub("#", " ".join(line.split()))
+
+
+def _edge_positions(lines: List[str]) -> List[int]:
+    """Indexes of the first and last non-empty lines (EDGE_LINES, at most a third of the page each)"""
+    filled = [i for i, line in enumerate(lines) if line.strip()]
+    n = min(EDGE_LINES, max(1, len(filled) // 3))
+    return sorted(set(filled[:n] + filled[-n:]))
+
+
+class TextCleaner:
+    """Cleans extracted pages and keeps running totals of what was removed"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._documents = 0
+        self._chars_saved = 0
+        self._tokens_saved = 0
+        self._tokens_before = 0
+
+    def clean_pages(
+        self,
+        pages: Sequence[str],
+        known_repeated: Iterable[str] = (),
+        new_document: bool = True,
+    ) -> CleanupResult:
+        """Clean `pages`; for later batches of a document, pass the previous
+        batch's `repeated` keys and `new_document=False`"""
+        raw = [page.replace("\r\n", "\n").replace("\r", "\n") for page in pages]
+        split = [[_SPACE_RE.sub(" ", line).strip() for line in page.split("\n")] for page in raw]
+
+        repeated = set(known_repeated)
+        min_pages = max(3, int(len(split) * REPEAT_RATIO))
+        if len(split) >= 3:
+            counts = Counter()
+            for lines in split:
+                counts.update({
+                    _line_key(lines[i]) for i in _edge_positions(lines) if len(lines[i]) <= MAX_HEADER_CHARS
+                })
+            repeated |= {key for key, n in counts.items() if n >= min_pages}
+
+        cleaned: List[str] = []
+        removed = 0
+        for lines in split:
+            edges = set(_edge_positions(lines))
+            kept = []
+            for i, line in enumerate(lines):
+                if i in edges and (_line_key(line) in repeated or _PAGE_NUMBER_RE.match(line)):
+                    removed += 1
+                    continue
+                kept.append(line)
+            page = "\n".join(kept)
+            page = _HYPHEN_RE.sub(r"\1\2", page)
+            page = _BLANK_LINES_RE.sub("\n\n", page).strip()
+            cleaned.append(page)
+
+        before = "\n".join(pages)
+        after = "\n".join(cleaned)
+        result = CleanupResult(
+            pages=cleaned,
+            chars_before=len(before),
+            chars_after=len(after),
+            tokens_before=count_tokens(before),
+            tokens_after=count_tokens(after),
+            removed_lines=removed,
+            repeated=frozenset(repeated),
+        )
+        with self._lock:
+            self._documents += int(new_document)
+            self._chars_saved += result.chars_saved
+            self._tokens_saved += result.tokens_saved
+            self._tokens_before += result.tokens_before
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "documents": self._documents,
+                "chars_saved": self._chars_saved,
+                "tokens_saved": self._tokens_saved,
+                "tokens_saved_ratio": round(self._tokens_saved / self._tokens_before, 4) if self._tokens_before else 0.0,
+            }
+
+
+_cleaner: TextCleaner | None = None
+
+
+def get_text_cleaner() -> TextCleaner:
+    """Get the process-wide text cleaner"""
+    global _cleaner
+    if _cleaner is None:
+        _cleaner = TextCleaner()
+    return _cleaner
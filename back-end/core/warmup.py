@@ -0,0 +1,126 @@
+"""Background warm-up and readiness.
+
+Warm-up steps (importing heavy modules, creating the GenAI client, resolving
+the embedding model, priming the LLM, prefetching recent indexes) are blocking
+callables that run concurrently, each on its own thread, after the worker has
+started. `/health` answers as soon as the process is up; `/ready` only once
+every step has finished (or `timeout` has passed), so a load balancer routes
+traffic to warm workers only.
+
+A failed step does not keep the worker out of rotation: it is reported, and the
+work happens lazily on the first request that needs it, as without warm-up.
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+log = logging.getLogger("ai-summary.warmup")
+
+
+class WarmupSkipped(Exception):
+    """Raised by a step that does not apply (e.g. no API key configured)"""
+
+
+@dataclass
+class _Step:
+    fn: Callable[[], Optional[str]]
+    status: str = "pending"  # pending, running, done, skipped, failed
+    detail: Optional[str] = None
+    started: Optional[float] = None
+    duration: Optional[float] = None
+
+
+class Warmup:
+    """Runs registered steps concurrently in the background and reports readiness"""
+
+    def __init__(self, timeout: float = 60.0):
+        self.timeout = timeout
+        self._steps: Dict[str, _Step] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+        self._timed_out = False
+
+    def register(self, name: str, fn: Callable[[], Optional[str]]) -> None:
+        """Register a blocking step; it may return a short detail string"""
+        self._steps[name] = _Step(fn=fn)
+
+    def start(self) -> None:
+        """Start all steps on the running event loop (idempotent)"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._executor is not None:
+            # steps cannot be interrupted; do not wait for them on shutdown
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @property
+    def ready(self) -> bool:
+        return self._finished is not None
+
+    def _run_step(self, name: str, step: _Step) -> None:
+        step.status = "running"
+        step.started = time.perf_counter()
+        try:
+            step.detail = step.fn()
+            step.status = "done"
+        except WarmupSkipped as e:
+            step.status = "skipped"
+            step.detail = str(e)
+        except Exception as e:
+            step.status = "failed"
+            step.detail = str(e)
+            log.warning(f"Warm-up step {name} failed: {e}")
+        step.duration = time.perf_counter() - step.started
+
+    async def _run(self) -> None:
+        self._started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(self._steps)), thread_name_prefix="warmup")
+        futures = [
+            loop.run_in_executor(self._executor, self._run_step, name, step)
+            for name, step in self._steps.items()
+        ]
+        if futures:
+            _, pending = await asyncio.wait(futures, timeout=self.timeout)
+            self._timed_out = bool(pending)
+        self._finished = time.perf_counter()
+        summary = ", ".join(
+            f"{name}={step.status}" + (f" ({step.duration * 1000:.0f}ms)" if step.duration is not None else "")
+            for name, step in self._steps.items()
+        )
+        log.info(
+            f"Warm-up {'timed out' if self._timed_out else 'finished'} in "
+            f"{(self._finished - self._started) * 1000:.0f}ms: {summary}"
+        )
+
+    def status(self) -> dict:
+        now = time.perf_counter()
+        end = self._finished or now
+        return {
+            "ready": self.ready,
+            "timed_out": self._timed_out,
+            "elapsed_ms": round((end - self._started) * 1000, 1) if self._started else 0.0,
+            "steps": {
+                name: {
+                    "status": step.status,
+                    "ms": round(
+                        (step.duration if step.duration is not None else now - step.started) * 1000, 1
+                    ) if step.started else None,
+                    "detail": step.detail,
+                }
+                for name, step in self._steps.items()
+            },
+        }
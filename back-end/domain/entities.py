@@ -1,6 +1,6 @@
 """Domain entities"""
 from dataclasses import dataclass
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -11,15 +11,60 @@ class Session:
     text: Optional[str] = None
     created_at: Optional[datetime] = None
     extracted: bool = False
+    content_hash: Optional[str] = None  # SHA-256 of the uploaded PDF
+    extracting: bool = False  # extraction in progress (possibly on another worker)
+
+    @property
+    def index_key(self) -> str:
+        """Key of the vector index; shared by every session of the same document"""
+        return self.content_hash or self.session_id
+
+
+@dataclass
+class Document:
+    """Uploaded document, identified by the SHA-256 of its content"""
+    document_id: str
+    source_session_id: str  # session holding the extracted text
+    characters: int = 0
+    created_at: Optional[datetime] = None
+    page_lengths: Optional[List[int]] = None  # characters per extracted page
+
+    def split_pages(self, text: str) -> Optional[List[str]]:
+        """Split the extracted text (pages joined with "\\n") back into pages"""
+        if not self.page_lengths:
+            return None
+        if sum(self.page_lengths) + len(self.page_lengths) - 1 != len(text):
+            return None
+        pages, pos = [], 0
+        for length in self.page_lengths:
+            pages.append(text[pos:pos + length])
+            pos += length + 1
+        return pages
 
 
 @dataclass
 class IndexStatus:
     """Index build status entity"""
     session_id: str
-    status: str  # pending, building, ready, failed
+    status: str  # pending, building, ready, failed, cancelled
     chunks: Optional[int] = None
     error: Optional[str] = None
+    queue_position: Optional[int] = None  # 1-based, while pending in the build queue
+    progress: Optional[float] = None  # 0..1 while building, when known
+
+
+@dataclass
+class SummaryProgress:
+    """Progress of the map phase of a hierarchical summary"""
+    done: int
+    total: int
+
+
+@dataclass
+class SummarySection:
+    """Summary of one section, emitted as soon as it is ready (1-based `index`)"""
+    index: int
+    text: str
 
 
 @dataclass
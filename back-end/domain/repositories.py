@@ -1,7 +1,11 @@
 """Repository interfaces (Ports)"""
 from abc import ABC, abstractmethod
-from typing import Optional, List
-from domain.entities import Session, IndexStatus
+from typing import AsyncIterator, Callable, Optional, List, Sequence
+from domain.entities import Session, IndexStatus, Document
+
+
+class ExtractionFailed(Exception):
+    """Raised by `SessionRepository.stream_text` when extraction fails after publishing text"""
 
 
 class SessionRepository(ABC):
@@ -26,6 +30,50 @@ class SessionRepository(ABC):
     async def exists(self, session_id: str) -> bool:
         """Check if session exists"""
         pass
+    
+    @abstractmethod
+    async def wait_until_extracted(self, session_id: str, timeout: float) -> Optional[Session]:
+        """Wait (up to `timeout` seconds) while the session is still being extracted"""
+        pass
+    
+    @abstractmethod
+    async def append_partial_text(self, session_id: str, text: str) -> None:
+        """Publish more extracted text of a session that is still being extracted"""
+        pass
+    
+    @abstractmethod
+    def stream_text(self, session_id: str, timeout: float) -> AsyncIterator[str]:
+        """Yield the session text in increments as extraction publishes it.
+
+        The increments concatenate to the final `Session.text`; the stream ends
+        once extraction finishes. Raises `asyncio.TimeoutError` after `timeout`
+        seconds, and `ExtractionFailed` if extraction fails after publishing text.
+        """
+        pass
+
+
+class DocumentRepository(ABC):
+    """Repository interface for the content-addressed document registry"""
+    
+    @abstractmethod
+    async def get(self, document_id: str) -> Optional[Document]:
+        """Get document by content hash"""
+        pass
+    
+    @abstractmethod
+    async def save(self, document: Document) -> None:
+        """Register document"""
+        pass
+    
+    @abstractmethod
+    async def delete(self, document_id: str) -> None:
+        """Forget document"""
+        pass
+    
+    @abstractmethod
+    async def forget_source(self, document_id: str, session_id: str) -> bool:
+        """Forget the document if `session_id` holds its text (the session is being deleted)"""
+        pass
 
 
 class CacheRepository(ABC):
@@ -45,6 +93,45 @@ class CacheRepository(ABC):
     async def delete(self, key: str) -> None:
         """Delete cached value"""
         pass
+    
+    @abstractmethod
+    def generate_key(self, text: str, *qualifiers: str) -> str:
+        """Build a cache key from text and the parameters that shape the result"""
+        pass
+    
+    @abstractmethod
+    async def stats(self) -> dict:
+        """Return entry count, size and hit/miss/eviction counters"""
+        pass
+
+
+class IndexBuilder(ABC):
+    """Progressive index build, fed page batches while extraction runs"""
+    
+    @abstractmethod
+    def add_pages(self, pages: Sequence[str]) -> int:
+        """Index the next pages (blocking); return the number of chunks so far"""
+        pass
+    
+    @abstractmethod
+    def finish(self) -> int:
+        """Write the final index (blocking); return the number of chunks"""
+        pass
+    
+    @abstractmethod
+    def write_keywords(self, batches: Sequence[Sequence[str]]) -> int:
+        """Write the keyword index for all extracted page batches (blocking); return the number of chunks"""
+        pass
+    
+    @abstractmethod
+    def discard(self) -> None:
+        """Remove the partial index of a cancelled build (blocking)"""
+        pass
+    
+    @abstractmethod
+    def abandon(self) -> None:
+        """Remove the partial vectors of a failed build, keeping its keywords (blocking)"""
+        pass
 
 
 class VectorStoreRepository(ABC):
@@ -56,13 +143,45 @@ class VectorStoreRepository(ABC):
         pass
     
     @abstractmethod
-    def build_index(self, session_id: str, text: str) -> None:
-        """Build index for session"""
+    def build_index(
+        self,
+        session_id: str,
+        text: str,
+        pages: Optional[Sequence[str]] = None,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> None:
+        """Build index for session (`pages`: per-page text, for page-aware chunks;
+        `progress(done, total)`: called as chunks are embedded, may raise to abort)"""
+        pass
+    
+    @abstractmethod
+    def has_keyword_index(self, session_id: str) -> bool:
+        """Check if the keyword (BM25) index exists"""
+        pass
+    
+    @abstractmethod
+    def build_keyword_index(self, session_id: str, text: str, pages: Optional[Sequence[str]] = None) -> None:
+        """Build the keyword (BM25) index for session; fast, run at extraction time"""
+        pass
+    
+    @abstractmethod
+    def open_index_builder(self, session_id: str) -> IndexBuilder:
+        """Start a progressive build; the partial index is queryable while it runs"""
+        pass
+    
+    @abstractmethod
+    def recent_index_keys(self, limit: int) -> List[str]:
+        """Keys of the most recently used indexes, newest first"""
+        pass
+    
+    @abstractmethod
+    def prefetch(self, session_id: str) -> None:
+        """Load an index into memory ahead of its first query (blocking)"""
         pass
     
     @abstractmethod
     def query(self, session_id: str, query: str, k: int = 4) -> List[str]:
-        """Query index"""
+        """Query index (keyword and vector results fused)"""
         pass
 
 
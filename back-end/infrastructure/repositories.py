@@ -1,20 +1,35 @@
 """Repository implementations (Adapters)"""
+import os
+import json
 import time
 import hashlib
 import asyncio
-from typing import Optional, List, Dict
+import codecs
+import logging
+import sqlite3
+import sys
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Optional, List, Dict, Sequence, Tuple
 from pathlib import Path
+from datetime import datetime
 
 from domain.repositories import (
+    ExtractionFailed,
     SessionRepository,
+    DocumentRepository,
     CacheRepository,
     VectorStoreRepository,
-    IndexStatusRepository
+    IndexStatusRepository,
+    IndexBuilder
 )
-from domain.entities import Session, IndexStatus
+from domain.entities import Session, IndexStatus, Document
 from core.faiss_adapter import FaissAdapter
 from core.file_storage import FileStorage
 
+log = logging.getLogger("ai-summary.repositories")
+
 
 class InMemorySessionRepository(SessionRepository):
     """In-memory session repository"""
@@ -22,14 +37,34 @@ class InMemorySessionRepository(SessionRepository):
     def __init__(self):
         self._sessions: Dict[str, Session] = {}
         self._pending_tasks: Dict[str, asyncio.Task] = {}
+        self._extracted_events: Dict[str, asyncio.Event] = {}
+        self._last_access: Dict[str, float] = {}
+        self._partials: Dict[str, List[str]] = {}
+        self._partial_events: Dict[str, asyncio.Event] = {}
     
     async def get(self, session_id: str) -> Optional[Session]:
-        return self._sessions.get(session_id)
+        session = self._sessions.get(session_id)
+        if session is not None:
+            self._last_access[session_id] = time.time()
+        return session
     
     async def save(self, session: Session) -> None:
         self._sessions[session.session_id] = session
+        self._last_access[session.session_id] = time.time()
+        if not session.extracting:
+            event = self._extracted_events.pop(session.session_id, None)
+            if event is not None:
+                event.set()
+            self._partials.pop(session.session_id, None)
+            self._notify_partial(session.session_id)
     
     async def delete(self, session_id: str) -> bool:
+        event = self._extracted_events.pop(session_id, None)
+        if event is not None:
+            event.set()
+        self._partials.pop(session_id, None)
+        self._notify_partial(session_id)
+        self._last_access.pop(session_id, None)
         if session_id in self._sessions:
             del self._sessions[session_id]
             return True
@@ -38,6 +73,66 @@ class InMemorySessionRepository(SessionRepository):
     async def exists(self, session_id: str) -> bool:
         return session_id in self._sessions
     
+    async def wait_until_extracted(self, session_id: str, timeout: float) -> Optional[Session]:
+        session = self._sessions.get(session_id)
+        if session is None or not session.extracting:
+            return session
+        event = self._extracted_events.setdefault(session_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            log.warning(f"Timed out waiting for extraction of {session_id}")
+        return self._sessions.get(session_id)
+    
+    def _notify_partial(self, session_id: str) -> None:
+        event = self._partial_events.pop(session_id, None)
+        if event is not None:
+            event.set()
+    
+    async def append_partial_text(self, session_id: str, text: str) -> None:
+        self._partials.setdefault(session_id, []).append(text)
+        self._notify_partial(session_id)
+    
+    async def stream_text(self, session_id: str, timeout: float) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        read = 0  # parts consumed
+        consumed = 0  # characters consumed
+        while True:
+            parts = self._partials.get(session_id)
+            if parts and read < len(parts):
+                new = "".join(parts[read:])
+                read = len(parts)
+                consumed += len(new)
+                yield new
+                continue
+            session = self._sessions.get(session_id)
+            if session is None or not session.extracting:
+                text = session.text if session else ""
+                if text and len(text) > consumed:
+                    yield text[consumed:]
+                elif consumed and not text:
+                    raise ExtractionFailed(session_id)
+                return
+            event = self._partial_events.setdefault(session_id, asyncio.Event())
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError(f"extraction of {session_id} is still running")
+            try:
+                await asyncio.wait_for(event.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+    
+    def cache_entries(self):
+        """Janitor hook: sessions that are not being extracted"""
+        for session_id, session in list(self._sessions.items()):
+            if not session.extracting:
+                yield session_id, self._last_access.get(session_id, 0.0), sys.getsizeof(session.text or "")
+    
+    def evict(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+        self._last_access.pop(session_id, None)
+    
     def set_pending_task(self, session_id: str, task: asyncio.Task) -> None:
         """Set pending extraction task"""
         self._pending_tasks[session_id] = task
@@ -51,34 +146,608 @@ class InMemorySessionRepository(SessionRepository):
         self._pending_tasks.pop(session_id, None)
 
 
-class InMemoryCacheRepository(CacheRepository):
-    """In-memory cache repository"""
+class FileSessionRepository(SessionRepository):
+    """Session repository shared by all worker processes through the filesystem.
+    
+    Session metadata lives in `<root>/sessions/<session_id>.json` and the extracted
+    text in `FileStorage` under the session's index key, so sessions of the same
+    document share one text file. Only metadata is cached in memory (revalidated
+    by file mtime); text is read from disk when a session is loaded.
+    """
+    
+    def __init__(self, storage_root: Path, poll_interval: float = 0.25):
+        self.storage = FileStorage(storage_root)
+        self._meta_root = Path(storage_root) / "sessions"
+        self._meta_root.mkdir(parents=True, exist_ok=True)
+        self._poll_interval = poll_interval
+        self._meta: Dict[str, tuple[int, dict]] = {}  # session_id -> (mtime_ns, metadata)
+        self._last_access: Dict[str, float] = {}
+        self._extracted_events: Dict[str, asyncio.Event] = {}
+        self._partial_events: Dict[str, asyncio.Event] = {}
+    
+    def _meta_path(self, session_id: str) -> Path:
+        return self._meta_root / f"{session_id}.json"
+    
+    def _partial_path(self, session_id: str) -> Path:
+        return self._meta_root / f"{session_id}.partial.txt"
+    
+    def _load_meta(self, session_id: str) -> Optional[dict]:
+        path = self._meta_path(session_id)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            self._meta.pop(session_id, None)
+            return None
+        self._last_access[session_id] = time.time()
+        cached = self._meta.get(session_id)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        try:
+            meta = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        self._meta[session_id] = (mtime, meta)
+        return meta
+    
+    def _get_sync(self, session_id: str) -> Optional[Session]:
+        meta = self._load_meta(session_id)
+        if meta is None:
+            return None
+        text = self.storage.read_text(meta["text_key"]) if meta.get("characters") else ""
+        created_at = meta.get("created_at")
+        return Session(
+            session_id=session_id,
+            text=text or "",
+            created_at=datetime.fromisoformat(created_at) if created_at else None,
+            extracted=meta.get("extracted", False),
+            content_hash=meta.get("content_hash"),
+            extracting=meta.get("extracting", False)
+        )
+    
+    def _save_sync(self, session: Session) -> None:
+        text = session.text or ""
+        text_key = session.index_key
+        if text:
+            self.storage.save_text(text_key, text)
+        meta = {
+            "session_id": session.session_id,
+            "created_at": session.created_at.isoformat() if session.created_at else None,
+            "extracted": session.extracted,
+            "content_hash": session.content_hash,
+            "extracting": session.extracting,
+            "text_key": text_key,
+            "characters": len(text),
+        }
+        path = self._meta_path(session.session_id)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, path)
+        self._meta.pop(session.session_id, None)
+        if not session.extracting:
+            self._partial_path(session.session_id).unlink(missing_ok=True)
+    
+    def _delete_sync(self, session_id: str) -> bool:
+        meta = self._load_meta(session_id)
+        self._meta.pop(session_id, None)
+        if meta is None:
+            return False
+        self._meta_path(session_id).unlink(missing_ok=True)
+        self._partial_path(session_id).unlink(missing_ok=True)
+        # Texts keyed by content hash may be shared with other sessions
+        if meta.get("text_key") == session_id:
+            self.storage.delete_text(session_id)
+        return True
+    
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, fn, *args)
+    
+    async def get(self, session_id: str) -> Optional[Session]:
+        return await self._run(self._get_sync, session_id)
+    
+    async def save(self, session: Session) -> None:
+        await self._run(self._save_sync, session)
+        if not session.extracting:
+            event = self._extracted_events.pop(session.session_id, None)
+            if event is not None:
+                event.set()
+            self._notify_partial(session.session_id)
+    
+    async def delete(self, session_id: str) -> bool:
+        event = self._extracted_events.pop(session_id, None)
+        if event is not None:
+            event.set()
+        return await self._run(self._delete_sync, session_id)
+    
+    async def exists(self, session_id: str) -> bool:
+        return await self._run(self._load_meta, session_id) is not None
+    
+    def cache_entries(self):
+        """Janitor hook: cached metadata (texts are never held in memory)"""
+        for session_id in list(self._meta):
+            yield session_id, self._last_access.get(session_id, 0.0), 512
+    
+    def evict(self, session_id: str) -> None:
+        self._meta.pop(session_id, None)
+        self._last_access.pop(session_id, None)
+    
+    def _append_partial_sync(self, session_id: str, text: str) -> None:
+        with open(self._partial_path(session_id), "a", encoding="utf-8") as f:
+            f.write(text)
+    
+    def _read_partial_sync(self, session_id: str, offset: int) -> bytes:
+        try:
+            with open(self._partial_path(session_id), "rb") as f:
+                f.seek(offset)
+                return f.read()
+        except FileNotFoundError:
+            return b""
+    
+    async def append_partial_text(self, session_id: str, text: str) -> None:
+        await self._run(self._append_partial_sync, session_id, text)
+        self._notify_partial(session_id)
+    
+    def _notify_partial(self, session_id: str) -> None:
+        event = self._partial_events.pop(session_id, None)
+        if event is not None:
+            event.set()
+    
+    async def stream_text(self, session_id: str, timeout: float) -> AsyncIterator[str]:
+        # Appends on this worker wake us immediately; other workers' appends are polled
+        deadline = time.monotonic() + timeout
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        offset = 0  # bytes of the partial file consumed
+        consumed = 0  # characters consumed
+        while True:
+            data = await self._run(self._read_partial_sync, session_id, offset)
+            if data:
+                offset += len(data)
+                new = decoder.decode(data)
+                if new:
+                    consumed += len(new)
+                    yield new
+                continue
+            meta = await self._run(self._load_meta, session_id)
+            if meta is None or not meta.get("extracting"):
+                session = await self.get(session_id)
+                text = session.text if session else ""
+                if text and len(text) > consumed:
+                    yield text[consumed:]
+                elif consumed and not text:
+                    raise ExtractionFailed(session_id)
+                return
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError(f"extraction of {session_id} is still running")
+            event = self._partial_events.setdefault(session_id, asyncio.Event())
+            try:
+                await asyncio.wait_for(event.wait(), min(self._poll_interval, remaining))
+            except asyncio.TimeoutError:
+                pass
+    
+    async def wait_until_extracted(self, session_id: str, timeout: float) -> Optional[Session]:
+        deadline = time.monotonic() + timeout
+        # Extractions on this worker wake us immediately; others are polled
+        event = self._extracted_events.setdefault(session_id, asyncio.Event())
+        while True:
+            meta = await self._run(self._load_meta, session_id)
+            if meta is None or not meta.get("extracting"):
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                log.warning(f"Timed out waiting for extraction of {session_id}")
+                break
+            try:
+                await asyncio.wait_for(event.wait(), min(self._poll_interval, remaining))
+            except asyncio.TimeoutError:
+                pass
+        if self._extracted_events.get(session_id) is event and not event.is_set():
+            self._extracted_events.pop(session_id, None)
+        return await self.get(session_id)
+
+
+class FileDocumentRepository(DocumentRepository):
+    """Document registry shared by all worker processes (`<root>/documents/<hash>.json`)"""
+    
+    def __init__(self, storage_root: Path):
+        self._root = Path(storage_root) / "documents"
+        self._root.mkdir(parents=True, exist_ok=True)
+    
+    def _path(self, document_id: str) -> Path:
+        return self._root / f"{document_id}.json"
+    
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, fn, *args)
+    
+    def _get_sync(self, document_id: str) -> Optional[Document]:
+        try:
+            meta = json.loads(self._path(document_id).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        created_at = meta.get("created_at")
+        return Document(
+            document_id=document_id,
+            source_session_id=meta["source_session_id"],
+            characters=meta.get("characters", 0),
+            created_at=datetime.fromisoformat(created_at) if created_at else None,
+            page_lengths=meta.get("page_lengths")
+        )
+    
+    def _save_sync(self, document: Document) -> None:
+        path = self._path(document.document_id)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({
+            "source_session_id": document.source_session_id,
+            "characters": document.characters,
+            "created_at": document.created_at.isoformat() if document.created_at else None,
+            "page_lengths": document.page_lengths,
+        }), encoding="utf-8")
+        os.replace(tmp, path)
+    
+    def _forget_source_sync(self, document_id: str, session_id: str) -> bool:
+        document = self._get_sync(document_id)
+        if document is None or document.source_session_id != session_id:
+            return False
+        self._path(document_id).unlink(missing_ok=True)
+        return True
+    
+    async def get(self, document_id: str) -> Optional[Document]:
+        return await self._run(self._get_sync, document_id)
+    
+    async def save(self, document: Document) -> None:
+        await self._run(self._save_sync, document)
+    
+    async def delete(self, document_id: str) -> None:
+        await self._run(lambda: self._path(document_id).unlink(missing_ok=True))
+    
+    async def forget_source(self, document_id: str, session_id: str) -> bool:
+        return await self._run(self._forget_source_sync, document_id, session_id)
+
+
+class InMemoryDocumentRepository(DocumentRepository):
+    """In-memory document registry keyed by content hash"""
+    
+    def __init__(self):
+        self._documents: Dict[str, Document] = {}
+        self._last_access: Dict[str, float] = {}
+    
+    async def get(self, document_id: str) -> Optional[Document]:
+        document = self._documents.get(document_id)
+        if document is not None:
+            self._last_access[document_id] = time.time()
+        return document
+    
+    async def save(self, document: Document) -> None:
+        self._documents[document.document_id] = document
+        self._last_access[document.document_id] = time.time()
     
-    def __init__(self, default_ttl: int = 600):
-        self._cache: Dict[str, tuple[float, str]] = {}  # (timestamp, value)
+    async def delete(self, document_id: str) -> None:
+        self.evict(document_id)
+    
+    async def forget_source(self, document_id: str, session_id: str) -> bool:
+        document = self._documents.get(document_id)
+        if document is None or document.source_session_id != session_id:
+            return False
+        self.evict(document_id)
+        return True
+    
+    def cache_entries(self):
+        """Janitor hook: entries outlive their source session once it is evicted"""
+        for document_id in list(self._documents):
+            yield document_id, self._last_access.get(document_id, 0.0), 256
+    
+    def evict(self, document_id: str) -> None:
+        self._documents.pop(document_id, None)
+        self._last_access.pop(document_id, None)
+
+
+def _cache_key(text: str, qualifiers: tuple) -> str:
+    digest = hashlib.sha256()
+    for part in qualifiers:
+        digest.update(part.encode("utf-8") + b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class _PeriodicExpiry(ABC):
+    """Background expiry loop shared by the cache implementations"""
+    
+    _expiry_interval: int = 60
+    _expiry_task: Optional[asyncio.Task] = None
+    
+    @abstractmethod
+    async def _purge(self) -> int:
+        """Remove expired entries; return how many were removed"""
+        pass
+    
+    def _ensure_expiry_task(self) -> None:
+        """Start the background expiry loop on the running event loop"""
+        if self._expiry_task is not None and not self._expiry_task.done():
+            return
+        try:
+            self._expiry_task = asyncio.get_running_loop().create_task(self._expire_periodically())
+        except RuntimeError:
+            self._expiry_task = None
+    
+    async def _expire_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self._expiry_interval)
+            try:
+                await self._purge()
+            except Exception as e:
+                log.warning(f"Cache expiry failed: {e}")
+
+
+class InMemoryCacheRepository(_PeriodicExpiry, CacheRepository):
+    """In-memory LRU cache with per-entry TTL and size/memory bounds"""
+    
+    def __init__(
+        self,
+        default_ttl: int = 600,
+        max_entries: int = 256,
+        max_bytes: int = 32 * 1024 * 1024,
+        expiry_interval: int = 60
+    ):
+        # key -> (expires_at, size_bytes, value); order = least recently used first
+        self._cache: "OrderedDict[str, tuple[float, int, str]]" = OrderedDict()
         self._default_ttl = default_ttl
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._expiry_interval = expiry_interval
+        self._expiry_task: Optional[asyncio.Task] = None
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
     
     async def get(self, key: str) -> Optional[str]:
-        if key not in self._cache:
+        entry = self._cache.get(key)
+        if entry is None:
+            self._misses += 1
             return None
         
-        timestamp, value = self._cache[key]
-        if time.time() - timestamp > self._default_ttl:
-            del self._cache[key]
+        expires_at, _, value = entry
+        if time.time() >= expires_at:
+            self._remove(key)
+            self._expirations += 1
+            self._misses += 1
             return None
         
+        self._cache.move_to_end(key)
+        self._hits += 1
         return value
     
     async def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
-        # ttl parameter is kept for interface compatibility but not used
-        self._cache[key] = (time.time(), value)
+        self._ensure_expiry_task()
+        size = len(value.encode("utf-8"))
+        if size > self._max_bytes:
+            return
+        self._remove(key)
+        self._cache[key] = (time.time() + (ttl or self._default_ttl), size, value)
+        self._bytes += size
+        while self._cache and (len(self._cache) > self._max_entries or self._bytes > self._max_bytes):
+            oldest = next(iter(self._cache))
+            self._remove(oldest)
+            self._evictions += 1
     
     async def delete(self, key: str) -> None:
-        self._cache.pop(key, None)
+        self._remove(key)
     
-    def generate_key(self, text: str) -> str:
-        """Generate cache key from text"""
-        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    def generate_key(self, text: str, *qualifiers: str) -> str:
+        """Generate cache key from text and the parameters that shape the result"""
+        return _cache_key(text, qualifiers)
+    
+    def purge_expired(self) -> int:
+        """Drop all expired entries, returning how many were removed"""
+        now = time.time()
+        expired = [key for key, (expires_at, _, _) in self._cache.items() if now >= expires_at]
+        for key in expired:
+            self._remove(key)
+        self._expirations += len(expired)
+        return len(expired)
+    
+    async def stats(self) -> dict:
+        lookups = self._hits + self._misses
+        return {
+            "backend": "memory",
+            "entries": len(self._cache),
+            "bytes": self._bytes,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            "evictions": self._evictions,
+            "expirations": self._expirations,
+        }
+    
+    def _remove(self, key: str) -> None:
+        entry = self._cache.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+    
+    async def _purge(self) -> int:
+        return self.purge_expired()
+
+
+class SQLiteCacheRepository(_PeriodicExpiry, CacheRepository):
+    """SQLite (WAL mode) cache shared by every worker process on the host.
+    
+    Entries survive restarts. Eviction is LRU by last access once the total
+    value size exceeds `max_bytes` or the entry count exceeds `max_entries`.
+    Database calls run on the default executor with one connection per thread;
+    the counters are updated on the event loop from their results.
+    """
+    
+    def __init__(
+        self,
+        db_path: Path,
+        default_ttl: int = 600,
+        max_entries: int = 10000,
+        max_bytes: int = 256 * 1024 * 1024,
+        expiry_interval: int = 60
+    ):
+        self._db_path = Path(db_path)
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._default_ttl = default_ttl
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._expiry_interval = expiry_interval
+        self._expiry_task = None
+        self._local = threading.local()
+        # Counters are per process; entries/bytes come from the shared database
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._init_schema()
+    
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self._db_path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def _init_schema(self) -> None:
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_last_access ON cache(last_access)")
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_expires_at ON cache(expires_at)")
+    
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, fn, *args)
+    
+    def _get_sync(self, key: str) -> Tuple[Optional[str], bool]:
+        """(value, whether an expired entry was removed)"""
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None, False
+        value, expires_at = row
+        if now >= expires_at:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            return None, True
+        conn.execute("UPDATE cache SET last_access = ? WHERE key = ?", (now, key))
+        return value, False
+    
+    def _set_sync(self, key: str, value: str, ttl: int) -> int:
+        """Store an entry; returns the number of entries evicted to stay in bounds"""
+        size = len(value.encode("utf-8"))
+        if size > self._max_bytes:
+            return 0
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now + ttl, now)
+            )
+            # Keep the most recently used entries within both bounds
+            evicted = conn.execute(
+                "DELETE FROM cache WHERE key IN ("
+                " SELECT key FROM ("
+                "  SELECT key,"
+                "   SUM(size) OVER (ORDER BY last_access DESC) AS running_bytes,"
+                "   ROW_NUMBER() OVER (ORDER BY last_access DESC) AS position"
+                "  FROM cache)"
+                " WHERE running_bytes > ? OR position > ?)",
+                (self._max_bytes, self._max_entries)
+            ).rowcount
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return max(evicted, 0)
+    
+    def _purge_sync(self) -> int:
+        removed = self._conn().execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),)).rowcount
+        return max(removed, 0)
+    
+    def _stats_sync(self) -> Tuple[int, int]:
+        return self._conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+    
+    async def get(self, key: str) -> Optional[str]:
+        value, expired = await self._run(self._get_sync, key)
+        if expired:
+            self._expirations += 1
+        if value is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+        return value
+    
+    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        self._ensure_expiry_task()
+        self._evictions += await self._run(self._set_sync, key, value, ttl or self._default_ttl)
+    
+    async def delete(self, key: str) -> None:
+        await self._run(lambda: self._conn().execute("DELETE FROM cache WHERE key = ?", (key,)))
+    
+    def generate_key(self, text: str, *qualifiers: str) -> str:
+        """Generate cache key from text and the parameters that shape the result"""
+        return _cache_key(text, qualifiers)
+    
+    async def stats(self) -> dict:
+        entries, size = await self._run(self._stats_sync)
+        lookups = self._hits + self._misses
+        return {
+            "backend": "sqlite",
+            "entries": entries,
+            "bytes": size,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            "evictions": self._evictions,
+            "expirations": self._expirations,
+        }
+    
+    async def _purge(self) -> int:
+        removed = await self._run(self._purge_sync)
+        self._expirations += removed
+        return removed
+
+
+class FAISSIndexBuilder(IndexBuilder):
+    """Progressive FAISS build; the finished index is loaded into the registry"""
+    
+    def __init__(self, adapter: FaissAdapter, session_id: str):
+        self.adapter = adapter
+        self.session_id = session_id
+        self._builder = adapter.open_builder(session_id)
+    
+    def add_pages(self, pages: Sequence[str]) -> int:
+        return self._builder.add_pages(pages)
+    
+    def finish(self) -> int:
+        chunks = self._builder.finish()
+        if chunks:
+            self.adapter.prefetch(self.session_id)
+        return chunks
+    
+    def write_keywords(self, batches: Sequence[Sequence[str]]) -> int:
+        chunks = self._builder.write_keywords(batches)
+        if chunks:
+            self.adapter.prefetch(self.session_id)
+        return chunks
+    
+    def discard(self) -> None:
+        self._builder.discard()
+    
+    def abandon(self) -> None:
+        self._builder.abandon()
 
 
 class FAISSVectorStoreRepository(VectorStoreRepository):
@@ -90,8 +759,29 @@ class FAISSVectorStoreRepository(VectorStoreRepository):
     def has_index(self, session_id: str) -> bool:
         return self.adapter.has_index(session_id)
     
-    def build_index(self, session_id: str, text: str) -> None:
-        self.adapter.build_index(session_id, text)
+    def build_index(
+        self,
+        session_id: str,
+        text: str,
+        pages: Optional[Sequence[str]] = None,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> None:
+        self.adapter.build_index(session_id, text, pages=pages, progress=progress)
+    
+    def has_keyword_index(self, session_id: str) -> bool:
+        return self.adapter.has_keyword_index(session_id)
+    
+    def build_keyword_index(self, session_id: str, text: str, pages: Optional[Sequence[str]] = None) -> None:
+        self.adapter.build_keyword_index(session_id, text, pages=pages)
+    
+    def open_index_builder(self, session_id: str) -> IndexBuilder:
+        return FAISSIndexBuilder(self.adapter, session_id)
+    
+    def recent_index_keys(self, limit: int) -> List[str]:
+        return self.adapter.recent_keys(limit)
+    
+    def prefetch(self, session_id: str) -> None:
+        self.adapter.prefetch(session_id)
     
     def query(self, session_id: str, query: str, k: int = 4) -> List[str]:
         return self.adapter.query(session_id, query, k=k)
@@ -102,10 +792,22 @@ class InMemoryIndexStatusRepository(IndexStatusRepository):
     
     def __init__(self):
         self._statuses: Dict[str, IndexStatus] = {}
+        self._updated_at: Dict[str, float] = {}
     
     async def get(self, session_id: str) -> Optional[IndexStatus]:
         return self._statuses.get(session_id)
     
     async def set(self, status: IndexStatus) -> None:
         self._statuses[status.session_id] = status
+        self._updated_at[status.session_id] = time.time()
+    
+    def cache_entries(self):
+        """Janitor hook: finished builds only (ready/failed/cancelled)"""
+        for key, status in list(self._statuses.items()):
+            if status.status in ("ready", "failed", "cancelled"):
+                yield key, self._updated_at.get(key, 0.0), 256
+    
+    def evict(self, key: str) -> None:
+        self._statuses.pop(key, None)
+        self._updated_at.pop(key, None)
 
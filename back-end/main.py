@@ -2,16 +2,19 @@
 Main Application Entry Point
 Clean Architecture Implementation
 """
-import asyncio
 import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from api.routes import router
-from uploads.config import FRONTEND_ORIGINS, ALLOW_ORIGIN_REGEX, DEFAULT_MODEL
-from core.infra import get_genai_client
+from api.routes import router, prune_finished_extractions
+from api.middleware import UploadSizeLimitMiddleware
+from uploads.config import FRONTEND_ORIGINS, ALLOW_ORIGIN_REGEX, MAX_PDF_SIZE
+from core.infra import close_genai_client
+from core.streaming import shutdown_stream_executor
+from application.dependencies import get_pdf_extractor, get_janitor, get_warmup
+from core.jobs import get_job_scheduler
 from core.config import UPLOAD_DIR, INDEX_ROOT
 
 # Configure logging
@@ -32,41 +35,23 @@ async def lifespan(app: FastAPI):
     INDEX_ROOT.mkdir(parents=True, exist_ok=True)
     log.info(f"Upload directory: {UPLOAD_DIR}")
     log.info(f"Index directory: {INDEX_ROOT}")
-    await _warmup()
+    janitor = get_janitor()
+    janitor.register_sweeper("extraction_tasks", prune_finished_extractions)
+    janitor.start()
+    get_job_scheduler().start()
+    # Heavy imports, clients, model priming and index prefetch run concurrently
+    # after the worker starts serving; /ready reports when they are done
+    warmup = get_warmup()
+    warmup.start()
     yield
     # Shutdown
     log.info("Shutting down gracefully...")
-
-
-async def _warmup():
-    """Warmup model with a tiny request to reduce first-token latency"""
-    sample_text = "اختبار تمهيدي صغير"
-    try:
-        client = get_genai_client()
-        if client is None:
-            log.info("GenAI client not available, skipping warmup")
-            return
-
-        def _do_warmup():
-            try:
-                stream = client.models.generate_content_stream(
-                    model=DEFAULT_MODEL,
-                    contents=[sample_text]
-                )
-                taken = 0
-                for chunk in stream:
-                    if getattr(chunk, "text", None):
-                        taken += 1
-                    if taken >= 2:
-                        break
-            except Exception as e:
-                log.debug(f"Warmup stream error (ignored): {e}")
-
-        loop = asyncio.get_running_loop()
-        await loop.run_in_executor(None, _do_warmup)
-        log.info("Warmup completed successfully")
-    except Exception as e:
-        log.debug(f"Warmup error (ignored): {e}")
+    await warmup.stop()
+    await janitor.stop()
+    await get_job_scheduler().stop()
+    shutdown_stream_executor()
+    close_genai_client()
+    get_pdf_extractor().shutdown()
 
 
 # Create FastAPI app
@@ -77,7 +62,10 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# Configure CORS
+# Abort oversized uploads while the body is still streaming in
+app.add_middleware(UploadSizeLimitMiddleware, max_body_size=MAX_PDF_SIZE)
+
+# Configure CORS (outermost, so early rejections still carry CORS headers)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=FRONTEND_ORIGINS,
@@ -1,6 +1,5 @@
 import os
 from dotenv import load_dotenv
-from google import genai
 
 # Load environment variables from a .env file if present
 load_dotenv()
@@ -15,15 +14,6 @@ OLLAMA_MODELS = [m.strip() for m in os.getenv("OLLAMA_MODELS", DEFAULT_MODEL).sp
 gemini_models = [m.strip() for m in os.getenv("gemini_models", DEFAULT_MODEL).split(",") if m.strip()]
 # Maximum PDF size in bytes (e.g., 15 MB)
 MAX_PDF_SIZE = int(os.getenv("MAX_PDF_SIZE", str(15 * 1024 * 1024)))
-# Create GenAI client only when an API key is provided to avoid raising
-# an exception on import if the environment variable is not set.
-client = None
-if Gemnikey:
-	try:
-		client = genai.Client(api_key=Gemnikey)
-	except Exception:
-		client = None
-
 # Frontend origins allowed for CORS (comma-separated)
 FRONTEND_ORIGINS = [
 	o.strip() for o in os.getenv(
@@ -43,13 +33,18 @@ SYSTEM_INSTRUCTION = (
     "تأكد من أن جميع الحقائق والمفاهيم الرئيسية (مثل 'الانفجار العظيم'، 'إشعاع الخلفية الكونية الميكروي') محفوظة بدقة. "
     "استخدم لغة عربية فصحى وخالية من الأخطاء."
 )
-generation_config =genai.types.GenerateContentConfig(
-    max_output_tokens=150,
-	temperature=0.2,
-    system_instruction=SYSTEM_INSTRUCTION 
-	# top_p=0.95,
-	# top_k=40,
-	# repetition_penalty=1.2,
-	# presence_penalty=0.6,
-	# frequency_penalty=0.6,
-)
+
+
+def get_generation_config():
+    """Generation config for short summaries (google-genai is imported on first use)"""
+    from google.genai import types
+    return types.GenerateContentConfig(
+        max_output_tokens=150,
+        temperature=0.2,
+        system_instruction=SYSTEM_INSTRUCTION
+        # top_p=0.95,
+        # top_k=40,
+        # repetition_penalty=1.2,
+        # presence_penalty=0.6,
+        # frequency_penalty=0.6,
+    )